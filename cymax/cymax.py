@@ -120,24 +120,15 @@ def parse_sitemap_xml(xml_text: str) -> Tuple[str, List[str]]:
         return "invalid", []
 
     root_name = get_localname(root.tag).lower()
-    urls: List[str] = []
 
+    # {*} matches the tag in any namespace (or none), so ElementTree does the
+    # filtering instead of a Python loop over every child
     if root_name == "sitemapindex":
-        for sitemap in root:
-            if get_localname(sitemap.tag).lower() != "sitemap":
-                continue
-            for child in sitemap:
-                if get_localname(child.tag).lower() == "loc" and child.text:
-                    urls.append(child.text.strip())
+        urls = [loc.text.strip() for loc in root.iterfind("{*}sitemap/{*}loc") if loc.text]
         return "index", urls
 
     if root_name == "urlset":
-        for url_node in root:
-            if get_localname(url_node.tag).lower() != "url":
-                continue
-            for child in url_node:
-                if get_localname(child.tag).lower() == "loc" and child.text:
-                    urls.append(child.text.strip())
+        urls = [loc.text.strip() for loc in root.iterfind("{*}url/{*}loc") if loc.text]
         return "urlset", urls
 
     return "unknown", []
@@ -10,11 +10,19 @@ import json
 import html
 import ast
 from typing import Optional, List, Dict
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from datetime import datetime, timezone
 from xml.etree import ElementTree as ET
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# libxml2-backed parsing is several times faster than html.parser on product
+# pages; the scrape job installs lxml, local runs may not have it
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
 # ================= ENV =================
 
 CURR_URL = os.getenv("CURR_URL", "https://www.discountlivingrooms.com").rstrip("/")
@@ -130,8 +138,12 @@ def _clean_strings(obj):
     return obj
 
 
+DATALAYER_RE = re.compile(r'dataLayer\s*=\s*(\[[\s\S]*?\]);')
+# Anything that can't appear in a JSON key built from a spec label
+JSON_KEY_RE = re.compile(r'[^a-zA-Z0-9_]')
+
 def extract_datalayer(html_text):
-    match = re.search(r'dataLayer\s*=\s*(\[[\s\S]*?\]);', html_text)
+    match = DATALAYER_RE.search(html_text)
     if not match:
         return None
 
@@ -150,9 +162,13 @@ def extract_datalayer(html_text):
     # 🔥 Clean ALL strings at source
     return _clean_strings(data)
 
+# Only the spec containers are read from a product page, so nothing else is
+# built into the tree
+SPEC_CONTAINERS = SoupStrainer('div', class_=['Product__additional-container', 'data-table'])
+
 def extract_additional_product_info(html_text):
     try:
-        soup = BeautifulSoup(html_text, 'html.parser')
+        soup = BeautifulSoup(html_text, HTML_PARSER, parse_only=SPEC_CONTAINERS)
         
         container = soup.find('div', class_='Product__additional-container')
         
@@ -173,7 +189,7 @@ def extract_additional_product_info(html_text):
             if data_div:
                 data_text = data_div.get_text(strip=True)
                 if label_text and data_text:
-                    json_key = re.sub(r'[^a-zA-Z0-9_]', '_', label_text.lower().replace(' ', '_'))
+                    json_key = JSON_KEY_RE.sub('_', label_text.lower().replace(' ', '_'))
                     additional_info[json_key] = data_text
 
         return json.dumps(additional_info, ensure_ascii=False)
@@ -205,6 +221,8 @@ def fetch_json(url: str) -> Optional[dict]:
 
 # ================= SITEMAP PROCESSING =================
 
+LOC_RE = re.compile(r'<loc>(https?://[^<]+)</loc>')
+
 def load_xml(url: str) -> Optional[ET.Element]:
     """Load XML with appropriate headers"""
     # For GitHub Actions, we might need longer timeout for sitemap
@@ -234,7 +252,7 @@ def load_xml(url: str) -> Optional[ET.Element]:
         try:
             # Create a dummy element
             root = ET.Element("urlset")
-            urls = re.findall(r'<loc>(https?://[^<]+)</loc>', data)
+            urls = LOC_RE.findall(data)
             for url_text in urls:
                 url_elem = ET.SubElement(root, "url")
                 loc_elem = ET.SubElement(url_elem, "loc")
@@ -11,13 +11,21 @@ import json
 import html
 import ast
 from typing import Optional, List, Dict, Tuple
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from datetime import datetime, timezone
 from xml.etree import ElementTree as ET
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+# libxml2-backed parsing is several times faster than html.parser on product
+# pages; the scrape job installs lxml, local runs may not have it
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
 # ================= ENV =================
 
 CURR_URL = os.getenv("CURR_URL", "https://www.emmamason.com").rstrip("/")
@@ -286,11 +294,17 @@ def _clean_strings(obj):
         return obj.replace('\\/', '/')
     return obj
 
+# dataLayer payload locations in product pages, tried in order
+DATALAYER_PATTERNS = [re.compile(r'dataLayer\.push\s*\(\s*(\{[\s\S]*?\})\s*\);')]
+TRAILING_COMMA_OBJ_RE = re.compile(r',\s*}')
+TRAILING_COMMA_LIST_RE = re.compile(r',\s*]')
+# Anything that can't appear in a JSON key built from a spec label
+JSON_KEY_RE = re.compile(r'[^a-zA-Z0-9_]')
+
 def extract_datalayer(html_text):
-    patterns = [r'dataLayer\.push\s*\(\s*(\{[\s\S]*?\})\s*\);']
     raw = None
-    for pattern in patterns:
-        match = re.search(pattern, html_text)
+    for pattern in DATALAYER_PATTERNS:
+        match = pattern.search(html_text)
         if match:
             raw = match.group(1)
             break
@@ -311,17 +325,21 @@ def extract_datalayer(html_text):
                 raw = f'[{raw}]'
             data = ast.literal_eval(raw)
         except (SyntaxError, ValueError):
-            raw = re.sub(r',\s*}', '}', raw)
-            raw = re.sub(r',\s*]', ']', raw)
+            raw = TRAILING_COMMA_OBJ_RE.sub('}', raw)
+            raw = TRAILING_COMMA_LIST_RE.sub(']', raw)
             try:
                 data = json.loads(raw)
             except:
                 return None
     return _clean_strings(data)
 
+# Only the spec table is read from a product page, so nothing else is built
+# into the tree
+SPEC_TABLES = SoupStrainer('table')
+
 def extract_additional_product_info(html_text):
     try:
-        soup = BeautifulSoup(html_text, 'html.parser')
+        soup = BeautifulSoup(html_text, HTML_PARSER, parse_only=SPEC_TABLES)
         table = soup.find('table', id='product-attribute-specs-table')
         if not table:
             table = soup.find('table', class_='additional-attributes')
@@ -340,7 +358,7 @@ def extract_additional_product_info(html_text):
                 label_text = th.get_text(strip=True)
                 data_text = td.get_text(strip=True)
                 if label_text and data_text:
-                    json_key = re.sub(r'[^a-zA-Z0-9_]', '_', label_text.lower().replace(' ', '_'))
+                    json_key = JSON_KEY_RE.sub('_', label_text.lower().replace(' ', '_'))
                     json_key = json_key.strip('_')
                     additional_info[json_key] = data_text
         return json.dumps(additional_info, ensure_ascii=False)
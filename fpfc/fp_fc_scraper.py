@@ -5,18 +5,37 @@ import sys
 import gc
 import threading
 import requests
+from requests.adapters import HTTPAdapter
 import random
 import re
 import json
 import html
 import ast
 from typing import Optional, List, Dict, Tuple
+from collections import deque
 from bs4 import BeautifulSoup
 from datetime import datetime, timezone
 from xml.etree import ElementTree as ET
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
+from sitemap_utils import (
+    ROBOTS_SITEMAP_RE,
+    ROBOTS_CRAWL_DELAY_RE,
+    iter_sitemap_locs,
+    is_product_url,
+    is_product_sitemap,
+)
+
+# libxml2-backed parsing is several times faster than html.parser on product
+# pages; the scrape job installs lxml, local runs may not have it
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
 # ================= ENV =================
 
 CURR_URL = os.getenv("CURR_URL", "https://www.furniturecart.com").rstrip("/")
@@ -27,10 +46,13 @@ MAX_URLS_PER_SITEMAP = int(os.getenv("MAX_URLS_PER_SITEMAP", "0"))
 MAX_WORKERS = int(os.getenv("MAX_WORKERS", "4"))
 REQUEST_DELAY_BASE = float(os.getenv("REQUEST_DELAY", "1.0"))
 SAMPLE_SIZE = int(os.getenv("SAMPLE_SIZE", "5"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
 # FlareSolverr configuration
 FLARESOLVERR_URL = os.getenv("FLARESOLVERR_URL", "http://localhost:8191/v1")
 FLARESOLVERR_TIMEOUT = int(os.getenv("FLARESOLVERR_TIMEOUT", "60"))
+# Opt-in preflight check; CI already waits for FlareSolverr before running us
+CHECK_DEPS = os.getenv("FPFC_CHECK_DEPS") == "1"
 
 # ---------- NEW: chunked single‑sitemap mode ----------
 SITEMAP_URL = os.getenv("SITEMAP_URL", "")          # process exactly this sitemap
@@ -45,9 +67,40 @@ else:
 
 SCRAPED_DATE = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
 
+# Large block buffer so CSV write() syscalls scale with bytes, not rows
+CSV_BUFFER_SIZE = 1 << 20
+
+CSV_HEADER = [
+    "Ref Product URL",
+    "Ref Product ID",
+    "Ref Varient ID",
+    "Ref Category",
+    "Ref Category URL",
+    "Ref Brand Name",
+    "Ref Product Name",
+    "Set Includes Name",
+    "Ref SKU",
+    "Ref MPN",
+    "Ref GTIN",
+    "Ref Price",
+    "Ref Main Image",
+    "Ref Quantity",
+    "Ref Group Attr 1",
+    "Ref Group Attr 2",
+    "Ref Status",
+    "Additional Product Data",
+    "Date Scrapped"
+]
+
 # ================= LOGGER =================
 
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+MIN_LOG_LEVEL = LOG_LEVELS.get(LOG_LEVEL, 20)
+
 def log(msg: str, level: str = "INFO"):
+    # Per-URL DEBUG chatter is dropped before any timestamp formatting or I/O
+    if LOG_LEVELS.get(level, 20) < MIN_LOG_LEVEL:
+        return
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     sys.stderr.write(f"[{timestamp}] [{level}] {msg}\n")
     sys.stderr.flush()
@@ -57,6 +110,10 @@ def log(msg: str, level: str = "INFO"):
 class FlareSolverrSession:
     def __init__(self):
         self.session = requests.Session()
+        # Keep one pooled connection per worker so concurrent fetches reuse sockets
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(MAX_WORKERS, 10))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
@@ -134,32 +191,6 @@ class FlareSolverrSession:
 
 flaresolverr_session = FlareSolverrSession()
 
-def get_sitemap_from_robots_txt():
-    try:
-        robots_url = f"{CURR_URL}/robots.txt"
-        content, status = flaresolverr_session.fetch(robots_url)
-        
-        if content and status == 200:
-            sitemap_url = None
-            for line in content.split('\n'):
-                if line.lower().startswith('sitemap:'):
-                    sitemap_url = line.split(':', 1)[1].strip()
-                    break
-            
-            if sitemap_url:
-                print(f"Extracted Sitemap URL: {sitemap_url}")
-                return sitemap_url
-            else:
-                print("No Sitemap directive found in robots.txt")
-                return None
-        else:
-            print(f"Error fetching robots.txt: Status {status}")
-            return None
-            
-    except Exception as e:
-        print(f"Error fetching robots.txt: {e}")
-        return None
-
 def check_robots_txt():
     """Check robots.txt for crawl delays and sitemap location"""
     robots_url = f"{CURR_URL}/robots.txt"
@@ -167,28 +198,21 @@ def check_robots_txt():
     
     content, status = flaresolverr_session.fetch(robots_url)
     if content and status == 200:
-        lines = content.split('\n')
         crawl_delay = None
         sitemap_url = None
-        
-        for line in lines:
-            line = line.strip()
-            if line.lower().startswith('sitemap:'):
-                parts = line.split(':', 1)
-                if len(parts) > 1:
-                    potential_url = parts[1].strip()
-                    if potential_url.startswith('http'):
-                        sitemap_url = potential_url
-                        log(f"Found valid sitemap in robots.txt: {sitemap_url}")
-            elif line.lower().startswith('crawl-delay:'):
-                try:
-                    parts = line.split(':', 1)
-                    if len(parts) > 1:
-                        crawl_delay = float(parts[1].strip())
-                        log(f"Found Crawl-delay: {crawl_delay} seconds")
-                except (ValueError, IndexError) as e:
-                    log(f"Error parsing crawl-delay: {e}")
-        
+
+        for potential_url in ROBOTS_SITEMAP_RE.findall(content):
+            if potential_url.startswith('http'):
+                sitemap_url = potential_url
+                log(f"Found valid sitemap in robots.txt: {sitemap_url}")
+
+        for value in ROBOTS_CRAWL_DELAY_RE.findall(content):
+            try:
+                crawl_delay = float(value)
+                log(f"Found Crawl-delay: {crawl_delay} seconds")
+            except ValueError as e:
+                log(f"Error parsing crawl-delay: {e}")
+
         return crawl_delay, sitemap_url
     
     log("No robots.txt found or couldn't fetch it")
@@ -254,17 +278,38 @@ request_manager = RequestManager()
 def http_get(url: str, crawl_delay=None) -> Optional[str]:
     return request_manager.fetch(url, crawl_delay=crawl_delay)
 
-def load_xml(url: str, crawl_delay=None) -> Optional[ET.Element]:
+def unique_locs(locs):
+    """Drop repeated sitemap entries, keeping first-seen order"""
+    seen = set()
+    for loc in locs:
+        if loc not in seen:
+            seen.add(loc)
+            yield loc
+
+def load_sitemap_locs(url: str, crawl_delay=None, keep=None, limit: int = 0) -> Optional[List[str]]:
+    """Fetch a sitemap and return its unique <loc> values.
+
+    When ``keep`` is given only matching locs are returned; a positive
+    ``limit`` stops parsing as soon as that many have been collected.
+    """
     data = http_get(url, crawl_delay)
     if not data:
         return None
     try:
-        return ET.fromstring(data)
+        locs = unique_locs(iter_sitemap_locs(data))
+        if keep:
+            locs = filter(keep, locs)
+        if limit > 0:
+            locs = islice(locs, limit)
+        return list(locs)
     except ET.ParseError as e:
         log(f"XML parse error for {url}: {e}")
         return None
 
 csv_lock = threading.Lock()
+seen_lock = threading.Lock()
+# stats counters are bumped from every worker; += on a dict entry is not atomic
+stats_lock = threading.Lock()
 
 def normalize_image_url(url: str) -> str:
     if not url:
@@ -279,11 +324,31 @@ def normalize_image_url(url: str) -> str:
     
     return url
 
-def extract_product_info_from_html(html: str, product_url: str) -> dict:
+def clearer_details(soup) -> List[Tuple[str, str]]:
+    """(title, description) text of the first run of li.clearer attribute rows"""
+    pairs = []
+    li = soup.find('li', class_='clearer')
+    while li:
+        title = li.find('div', class_='title')
+        desc = li.find('div', class_='description')
+        if title and desc:
+            pairs.append((title.get_text(), desc.get_text(strip=True)))
+        li = li.find_next_sibling('li', class_='clearer')
+    return pairs
+
+def find_detail(pairs: List[Tuple[str, str]], key: str) -> str:
+    for title, desc in pairs:
+        if key in title:
+            return desc
+    return ''
+
+def extract_product_info_from_html(html: str, product_url: str, soup=None) -> dict:
     """
     Parse product HTML and return a dictionary with all required fields.
+    Pass soup when the page has already been parsed to skip a second parse.
     """
-    soup = BeautifulSoup(html, 'html.parser')
+    if soup is None:
+        soup = BeautifulSoup(html, HTML_PARSER)
     info = {}
 
     # --- product_id ---
@@ -373,17 +438,12 @@ def extract_product_info_from_html(html: str, product_url: str) -> dict:
                 if desc_div:
                     color = desc_div.get_text(strip=True)
                     break
+    # Fallback attribute list, walked at most once and shared by the lookups below
+    detail_pairs = None
     if not color:
         # Fallback: look in the dimension/attribute list
-        color_li = soup.find('li', class_='clearer')
-        while color_li:
-            title = color_li.find('div', class_='title')
-            if title and 'Color' in title.get_text():
-                desc = color_li.find('div', class_='description')
-                if desc:
-                    color = desc.get_text(strip=True)
-                    break
-            color_li = color_li.find_next_sibling('li', class_='clearer')
+        detail_pairs = clearer_details(soup)
+        color = find_detail(detail_pairs, 'Color')
     info['group_attr_2'] = color
 
     # --- status (availability) ---
@@ -397,15 +457,9 @@ def extract_product_info_from_html(html: str, product_url: str) -> dict:
             status = 'Out of Stock'
     if not status:
         # Fallback from product details
-        status_li = soup.find('li', class_='clearer')
-        while status_li:
-            title = status_li.find('div', class_='title')
-            if title and 'Availability' in title.get_text():
-                desc = status_li.find('div', class_='description')
-                if desc:
-                    status = desc.get_text(strip=True)
-                    break
-            status_li = status_li.find_next_sibling('li', class_='clearer')
+        if detail_pairs is None:
+            detail_pairs = clearer_details(soup)
+        status = find_detail(detail_pairs, 'Availability')
     info['status'] = status
 
     # --- additional_data: JSON with extra info (collection, dimensions, features) ---
@@ -417,15 +471,9 @@ def extract_product_info_from_html(html: str, product_url: str) -> dict:
     if coll_link:
         collection = coll_link.get_text(strip=True)
     else:
-        coll_li = soup.find('li', class_='clearer')
-        while coll_li:
-            title = coll_li.find('div', class_='title')
-            if title and 'Collection' in title.get_text():
-                desc = coll_li.find('div', class_='description')
-                if desc:
-                    collection = desc.get_text(strip=True)
-                    break
-            coll_li = coll_li.find_next_sibling('li', class_='clearer')
+        if detail_pairs is None:
+            detail_pairs = clearer_details(soup)
+        collection = find_detail(detail_pairs, 'Collection')
     additional['collection'] = collection
 
     # Dimensions (extract from the dimensions tab)
@@ -459,34 +507,53 @@ def extract_product_info_from_html(html: str, product_url: str) -> dict:
     return info
 
 
+def build_row(url: str, info: dict, set_name: str = '') -> list:
+    """Map extracted product info onto the CSV_HEADER column order"""
+    return [
+        url,
+        info.get('product_id', ''),
+        info.get('variation_id', ''),
+        info.get('category', ''),
+        info.get('category_url', ''),
+        info.get('brand', ''),
+        info.get('name', ''),
+        set_name,
+        info.get('sku', ''),
+        info.get('mpn', ''),
+        '',  # empty column
+        info.get('price', ''),
+        normalize_image_url(info.get('main_image', '')),
+        info.get('quantity', ''),
+        info.get('group_attr_1', ''),
+        info.get('group_attr_2', ''),
+        info.get('status', ''),
+        info.get('additional_data', ''),
+        SCRAPED_DATE
+    ]
+
+
+# Product.Bundle initialization inside an inline script
+BUNDLE_RE = re.compile(r'var bundle = new Product\.Bundle\(({.*?})\);', re.DOTALL)
+
 def getBundleData(html):
-  
-    soup = BeautifulSoup(html, 'html.parser')
-    
-    # Find script tags containing Product.Bundle initialization
-    script_pattern = re.compile(r'var bundle = new Product\.Bundle\(({.*?})\);', re.DOTALL)
-    
-    # Look in all script tags
-    for script in soup.find_all('script'):
-        if script.string:
-            # Search for Product.Bundle pattern
-            match = script_pattern.search(script.string)
-            if match:
-                # Return the raw JSON string from the JavaScript object
-                return match.group(1).strip()
+    # The pattern only occurs inside the inline script, so search the raw
+    # page instead of parsing it just to walk the <script> tags
+    match = BUNDLE_RE.search(html)
+    if match:
+        # Return the raw JSON string from the JavaScript object
+        return match.group(1).strip()
     
     return None
 
 def process_product_data(product_url: str, writer, seen: set, stats: dict, crawl_delay=None):
-    if product_url in seen:
-        return
-    seen.add(product_url)
-
-    log(f"Processing product URL: {product_url}", "DEBUG")
+    with seen_lock:
+        if product_url in seen:
+            return
+        seen.add(product_url)
 
     # Fetch the original product page
     html = http_get(product_url, crawl_delay)
-    soup = BeautifulSoup(html, 'html.parser')
+    soup = BeautifulSoup(html, HTML_PARSER)
 
     # --- Extract bundle data from JavaScript ---
     bundleId = None
@@ -510,6 +577,8 @@ def process_product_data(product_url: str, writer, seen: set, stats: dict, crawl
 
     is_bundle = bool(bundleId and bundle_option_id and max_selections_length > 0)
     variation_rows_written = 0
+    # Rows are collected per product and written in one locked batch
+    rows = []
 
     if is_bundle:
         log(f"Bundle detected (ID: {bundleId}, option: {bundle_option_id}, max selections: {max_selections_length}).", "DEBUG")
@@ -564,7 +633,7 @@ def process_product_data(product_url: str, writer, seen: set, stats: dict, crawl
                     if not variation_html:
                         continue
 
-                    variation_soup = BeautifulSoup(variation_html, 'html.parser')
+                    variation_soup = BeautifulSoup(variation_html, HTML_PARSER)
                     var_bundle_set = variation_soup.find('div', class_='bundle-set')
                     if not var_bundle_set:
                         continue
@@ -584,44 +653,23 @@ def process_product_data(product_url: str, writer, seen: set, stats: dict, crawl
 
                     # --- Valid variation – extract product data ---
                     try:
-                        var_product_info = extract_product_info_from_html(variation_html, variation_url)
+                        var_product_info = extract_product_info_from_html(variation_html, variation_url, variation_soup)
                     except Exception as e:
                         log(f"Failed to extract product info from variation: {e}", "ERROR")
-                        stats['errors'] += 1
+                        with stats_lock:
+                            stats['errors'] += 1
                         continue
 
-                    # Write CSV row
+                    # Queue CSV row
                     try:
-                        row = [
-                            variation_url,
-                            var_product_info.get('product_id', ''),
-                            var_product_info.get('variation_id', ''),
-                            var_product_info.get('category', ''),
-                            var_product_info.get('category_url', ''),
-                            var_product_info.get('brand', ''),
-                            var_product_info.get('name', ''),
-                            active_name,
-                            var_product_info.get('sku', ''),
-                            var_product_info.get('mpn', ''),
-                            '',  # empty column
-                            var_product_info.get('price', ''),
-                            normalize_image_url(var_product_info.get('main_image', '')),
-                            var_product_info.get('quantity', ''),
-                            var_product_info.get('group_attr_1', ''),
-                            var_product_info.get('group_attr_2', ''),
-                            var_product_info.get('status', ''),
-                            var_product_info.get('additional_data', ''),
-                            SCRAPED_DATE
-                        ]
-                        with csv_lock:
-                            writer.writerow(row)
-                        stats['products_fetched'] += 1
+                        rows.append(build_row(variation_url, var_product_info, active_name))
                         variation_rows_written += 1
                         processed_names.add(active_name)
                         log(f"Fetched bundle variation: {active_name}", "INFO")
                     except Exception as e:
-                        log(f"Error writing row for variation: {e}", "ERROR")
-                        stats['errors'] += 1
+                        log(f"Error building row for variation: {e}", "ERROR")
+                        with stats_lock:
+                            stats['errors'] += 1
 
                 # After loop: warn about missing variations
                 missing = expected_names - processed_names
@@ -631,41 +679,30 @@ def process_product_data(product_url: str, writer, seen: set, stats: dict, crawl
     # --- If we are not a bundle, OR we are a bundle but failed to write any variation row, write the original product row ---
     if not is_bundle or variation_rows_written == 0:
         try:
-            product_info = extract_product_info_from_html(html, product_url)
-            row = [
-                product_url,
-                product_info.get('product_id', ''),
-                product_info.get('variation_id', ''),
-                product_info.get('category', ''),
-                product_info.get('category_url', ''),
-                product_info.get('brand', ''),
-                product_info.get('name', ''),
-                '',#set includes name
-                product_info.get('sku', ''),
-                product_info.get('mpn', ''),
-                '',  # empty column
-                product_info.get('price', ''),
-                normalize_image_url(product_info.get('main_image', '')),
-                product_info.get('quantity', ''),
-                product_info.get('group_attr_1', ''),
-                product_info.get('group_attr_2', ''),
-                product_info.get('status', ''),
-                product_info.get('additional_data', ''),
-                SCRAPED_DATE
-            ]
-            with csv_lock:
-                writer.writerow(row)
-            stats['products_fetched'] += 1
+            product_info = extract_product_info_from_html(html, product_url, soup)
+            rows.append(build_row(product_url, product_info))
             log(f"Fetched original product {product_info.get('sku', '')}: {product_info.get('name', '')[:50]}...", "INFO")
         except Exception as e:
-            log(f"Failed to extract/write original product info: {e}", "ERROR")
-            stats['errors'] += 1
-    stats['urls_processed'] += 1
+            log(f"Failed to extract original product info: {e}", "ERROR")
+            with stats_lock:
+                stats['errors'] += 1
+
+    if rows:
+        try:
+            with csv_lock:
+                writer.writerows(rows)
+            with stats_lock:
+                stats['products_fetched'] += len(rows)
+        except Exception as e:
+            log(f"Error writing rows for {product_url}: {e}", "ERROR")
+            with stats_lock:
+                stats['errors'] += 1
+    with stats_lock:
+        stats['urls_processed'] += 1
 
 # ================= MAIN =================
 
 def main():
-    crawl_delay, robots_sitemap = check_robots_txt()
     crawl_delay = 0  # Override for this site (adjust if needed)
     
     # ------------------------------------------------------------------
@@ -682,66 +719,31 @@ def main():
         log("=" * 60)
 
         # Load the sitemap
-        xml = load_xml(SITEMAP_URL, crawl_delay)
-        if not xml:
+        start = URL_OFFSET
+        # limit = 0 means "all remaining"; otherwise stop parsing at the chunk end
+        end = start + MAX_URLS_PER_SITEMAP if MAX_URLS_PER_SITEMAP > 0 else 0
+
+        # Extract product URLs (same filtering as before)
+        urls = load_sitemap_locs(SITEMAP_URL, crawl_delay, keep=is_product_url, limit=end)
+        if urls is None:
             log(f"Failed to load sitemap: {SITEMAP_URL}", "ERROR")
             sys.exit(1)
 
-        # Extract all product URLs (same filtering as before)
-        ns = {"ns": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-        urls = []
-        for path in [".//ns:url/ns:loc", ".//url/loc", ".//loc"]:
-            elements = xml.findall(path, ns) if "ns:" in path else xml.findall(path)
-            if elements:
-                urls = [
-                    e.text.strip()
-                    for e in elements
-                    if e.text
-                    and not any(ext in e.text for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.svg'])
-                    and ('.html' in e.text)
-                ]
-                if urls:
-                    break
-
         if not urls:
             log(f"No product URLs found in sitemap: {SITEMAP_URL}", "WARNING")
             sys.exit(0)
 
-        total_urls = len(urls)
-        start = URL_OFFSET
-        # limit = 0 means "all remaining"
-        end = start + MAX_URLS_PER_SITEMAP if MAX_URLS_PER_SITEMAP > 0 else total_urls
-        urls_to_process = urls[start:end]
+        urls_to_process = urls[start:]
 
-        log(f"Sitemap contains {total_urls} product URLs. Processing {len(urls_to_process)} URLs (offset {start})")
+        log(f"Read {len(urls)} product URLs from sitemap. Processing {len(urls_to_process)} URLs (offset {start})")
         if not urls_to_process:
             log("No URLs to process in this chunk – exiting.")
             sys.exit(0)
 
         # Initialize CSV and write header
-        with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
+        with open(OUTPUT_CSV, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE) as f:
             writer = csv.writer(f)
-            writer.writerow([
-                "Ref Product URL",
-                "Ref Product ID",
-                "Ref Varient ID",
-                "Ref Category",
-                "Ref Category URL",
-                "Ref Brand Name",
-                "Ref Product Name",
-                "Set Includes Name",
-                "Ref SKU",
-                "Ref MPN",
-                "Ref GTIN",
-                "Ref Price",
-                "Ref Main Image",
-                "Ref Quantity",
-                "Ref Group Attr 1",
-                "Ref Group Attr 2",
-                "Ref Status",
-                "Additional Product Data",
-                "Date Scrapped"
-            ])
+            writer.writerow(CSV_HEADER)
 
             seen = set()
             stats = {
@@ -762,9 +764,12 @@ def main():
                         future.result()
                     except Exception as e:
                         log(f"Error in thread execution: {e}", "ERROR")
-                        stats['errors'] += 1
+                        with stats_lock:
+                            stats['errors'] += 1
 
             gc.collect()
+            f.flush()
+            os.fsync(f.fileno())
 
         # Statistics for this chunk
         log("=" * 60)
@@ -800,6 +805,9 @@ def main():
     log(f"Sample Size for Checking: {SAMPLE_SIZE}")
     log("=" * 60)
 
+    # robots.txt is only needed to discover the index; chunk mode gets its
+    # sitemap from the plan job and ignores the crawl delay anyway.
+    _, robots_sitemap = check_robots_txt()
     sitemap = SITEMAP_INDEX
     if robots_sitemap and robots_sitemap.startswith('http'):
         sitemap = robots_sitemap
@@ -811,19 +819,11 @@ def main():
             log(f"No valid sitemap in robots.txt, using default: {sitemap}")
 
     log(f"Loading sitemap index from {sitemap}")
-    index = load_xml(sitemap, crawl_delay)
-    if index is None:
+    sitemaps = load_sitemap_locs(sitemap, crawl_delay, keep=is_product_sitemap)
+    if sitemaps is None:
         log("Failed to load sitemap index", "ERROR")
         sys.exit(1)
 
-    ns = {"ns": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-    sitemaps = []
-    for path in [".//ns:sitemap/ns:loc", ".//sitemap/loc", ".//loc"]:
-        elements = index.findall(path, ns) if "ns:" in path else index.findall(path)
-        if elements:
-            sitemaps = [e.text.strip() for e in elements if e.text]
-            break
-
     if not sitemaps:
         log("No sitemaps found with XML parsing, trying regex", "WARNING")
         # (regex fallback could be added, but we assume XML works)
@@ -838,29 +838,9 @@ def main():
     log(f"Total sitemaps found: {len(sitemaps)}")
     log(f"Sitemaps to process: {len(sitemaps_to_process)}")
 
-    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
+    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE) as f:
         writer = csv.writer(f)
-        writer.writerow([
-            "Ref Product URL",
-            "Ref Product ID",
-            "Ref Varient ID",
-            "Ref Category",
-            "Ref Category URL",
-            "Ref Brand Name",
-            "Ref Product Name",
-            "Set Includes Name",
-            "Ref SKU",
-            "Ref MPN",
-            "Ref GTIN",
-            "Ref Price",
-            "Ref Main Image",
-            "Ref Quantity",
-            "Ref Group Attr 1",
-            "Ref Group Attr 2",
-            "Ref Status",
-            "Additional Product Data",
-            "Date Scrapped"
-        ])
+        writer.writerow(CSV_HEADER)
 
         seen = set()
         stats = {
@@ -870,53 +850,54 @@ def main():
             'errors': 0
         }
 
-        for sitemap_url in sitemaps_to_process:
-            stats['sitemaps_processed'] += 1
-            log(f"Processing sitemap {stats['sitemaps_processed']}/{len(sitemaps_to_process)}: {sitemap_url}")
-
-            xml = load_xml(sitemap_url, crawl_delay)
-            if not xml:
-                log(f"Failed to load sitemap: {sitemap_url}", "ERROR")
-                continue
-
-            urls = []
-            for path in [".//ns:url/ns:loc", ".//url/loc", ".//loc"]:
-                elements = xml.findall(path, ns) if "ns:" in path else xml.findall(path)
-                if elements:
-                    urls = [
-                        e.text.strip()
-                        for e in elements
-                        if e.text
-                        and not any(ext in e.text for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.svg'])
-                        and ('.html' in e.text)
+        # The next sitemap is fetched in the background while the current
+        # one's products are scraped, so its FlareSolverr round-trip overlaps
+        # with product work. Only one sitemap is read ahead, keeping a single
+        # extra browser load and one spare URL list at a time
+        def load_product_urls(sitemap_url):
+            return load_sitemap_locs(sitemap_url, crawl_delay, keep=is_product_url, limit=MAX_URLS_PER_SITEMAP)
+
+        with ThreadPoolExecutor(max_workers=1) as sitemap_executor:
+            pending = deque()
+            if sitemaps_to_process:
+                pending.append(sitemap_executor.submit(load_product_urls, sitemaps_to_process[0]))
+            for i, sitemap_url in enumerate(sitemaps_to_process):
+                urls = pending.popleft().result()
+                if i + 1 < len(sitemaps_to_process):
+                    pending.append(sitemap_executor.submit(load_product_urls, sitemaps_to_process[i + 1]))
+                stats['sitemaps_processed'] += 1
+                log(f"Processing sitemap {stats['sitemaps_processed']}/{len(sitemaps_to_process)}: {sitemap_url}")
+
+                if urls is None:
+                    log(f"Failed to load sitemap: {sitemap_url}", "ERROR")
+                    continue
+
+                if not urls:
+                    log(f"No product URLs found in sitemap: {sitemap_url}", "WARNING")
+                    continue
+
+                if MAX_URLS_PER_SITEMAP > 0:
+                    log(f"Limited to the first {len(urls)} product URLs")
+                else:
+                    log(f"Found {len(urls)} product URLs in this sitemap")
+
+                with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                    futures = [
+                        executor.submit(process_product_data, url, writer, seen, stats, crawl_delay)
+                        for url in urls
                     ]
-                    if urls:
-                        break
-
-            if not urls:
-                log(f"No product URLs found in sitemap: {sitemap_url}", "WARNING")
-                continue
+                    for future in as_completed(futures):
+                        try:
+                            future.result()
+                        except Exception as e:
+                            log(f"Error in thread execution: {e}", "ERROR")
+                            with stats_lock:
+                                stats['errors'] += 1
 
-            if MAX_URLS_PER_SITEMAP > 0:
-                original_count = len(urls)
-                urls = urls[:MAX_URLS_PER_SITEMAP]
-                log(f"Limited to {len(urls)} out of {original_count} URLs")
-            else:
-                log(f"Found {len(urls)} product URLs in this sitemap")
+                gc.collect()
 
-            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-                futures = [
-                    executor.submit(process_product_data, url, writer, seen, stats, crawl_delay)
-                    for url in urls
-                ]
-                for future in as_completed(futures):
-                    try:
-                        future.result()
-                    except Exception as e:
-                        log(f"Error in thread execution: {e}", "ERROR")
-                        stats['errors'] += 1
-
-            gc.collect()
+        f.flush()
+        os.fsync(f.fileno())
 
     # Statistics
     log("=" * 60)
@@ -941,11 +922,14 @@ if __name__ == "__main__":
         log("Error: CURR_URL environment variable is required", "ERROR")
         sys.exit(1)
 
-    # Test FlareSolverr connection (only warn on failure)
-    if FLARESOLVERR_URL:
+    # Test FlareSolverr connection (only warn on failure). Goes through the shared
+    # session so the connection opened here is reused by the first real fetch.
+    if not FLARESOLVERR_URL:
+        log("⚠ FLARESOLVERR_URL not set, requests will use direct HTTP (may fail behind Cloudflare)")
+    elif CHECK_DEPS:
         log(f"Testing FlareSolverr connection at {FLARESOLVERR_URL}")
         try:
-            test_response = requests.post(FLARESOLVERR_URL, json={"cmd": "sessions.list"}, timeout=10)
+            test_response = flaresolverr_session.session.post(FLARESOLVERR_URL, json={"cmd": "sessions.list"}, timeout=10)
             if test_response.status_code == 200:
                 log("✓ FlareSolverr connection successful")
             else:
@@ -953,7 +937,5 @@ if __name__ == "__main__":
         except Exception as e:
             log(f"⚠ FlareSolverr connection failed: {e}")
             log("Continuing anyway, but requests may fail...")
-    else:
-        log("⚠ FLARESOLVERR_URL not set, requests will use direct HTTP (may fail behind Cloudflare)")
 
     main()
\ No newline at end of file
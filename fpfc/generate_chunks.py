@@ -10,12 +10,21 @@ import sys
 import json
 import time
 import requests
+from requests.adapters import HTTPAdapter
 import re
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, List, Dict, Tuple
 from xml.etree import ElementTree as ET
 from datetime import datetime, timezone
 
+from sitemap_utils import (
+    ROBOTS_SITEMAP_RE,
+    ROBOTS_CRAWL_DELAY_RE,
+    iter_sitemap_locs,
+    is_product_url,
+    is_product_sitemap,
+)
+
 # ---------- ENV ----------
 CURR_URL = os.environ.get("CURR_URL", "").rstrip("/")
 if not CURR_URL:
@@ -37,6 +46,10 @@ FLARESOLVERR_TIMEOUT = int(os.getenv("FLARESOLVERR_TIMEOUT", "120"))
 class FlareSolverrSession:
     def __init__(self):
         self.session = requests.Session()
+        # Keep one pooled connection per worker so concurrent fetches reuse sockets
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(CHUNK_GEN_WORKERS, 10))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
@@ -132,28 +145,22 @@ def check_robots_txt():
     
     content, status = flaresolverr_session.fetch(robots_url)
     if content and status == 200:
-        lines = content.split('\n')
         crawl_delay = None
         sitemap_url = None
-        
-        for line in lines:
-            line = line.strip()
-            if line.lower().startswith('sitemap:'):
-                parts = line.split(':', 1)
-                if len(parts) > 1:
-                    potential_url = sanitize_url_text(parts[1].strip())
-                    if potential_url.startswith('http'):
-                        sitemap_url = potential_url
-                        log(f"Found valid sitemap in robots.txt: {sitemap_url}")
-            elif line.lower().startswith('crawl-delay:'):
-                try:
-                    parts = line.split(':', 1)
-                    if len(parts) > 1:
-                        crawl_delay = float(parts[1].strip())
-                        log(f"Found Crawl-delay: {crawl_delay} seconds")
-                except (ValueError, IndexError) as e:
-                    log(f"Error parsing crawl-delay: {e}")
-        
+
+        for value in ROBOTS_SITEMAP_RE.findall(content):
+            potential_url = sanitize_url_text(value)
+            if potential_url.startswith('http'):
+                sitemap_url = potential_url
+                log(f"Found valid sitemap in robots.txt: {sitemap_url}")
+
+        for value in ROBOTS_CRAWL_DELAY_RE.findall(content):
+            try:
+                crawl_delay = float(value)
+                log(f"Found Crawl-delay: {crawl_delay} seconds")
+            except ValueError as e:
+                log(f"Error parsing crawl-delay: {e}")
+
         return crawl_delay, sitemap_url
     
     log("No robots.txt found or couldn't fetch it")
@@ -193,17 +200,12 @@ if not index_xml:
     sys.exit(1)
 
 try:
-    root = ET.fromstring(index_xml)
+    # Unique nested sitemaps only, minus the ones that can't hold products
+    sitemap_locs = [loc for loc in dict.fromkeys(iter_sitemap_locs(index_xml)) if is_product_sitemap(loc)]
 except ET.ParseError as e:
     print(f"Failed to parse sitemap index XML: {e}", file=sys.stderr)
     sys.exit(1)
 
-ns = {"ns": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-sitemap_locs = []
-for loc in root.findall(".//ns:loc", ns) or root.findall(".//loc"):
-    if loc.text:
-        sitemap_locs.append(loc.text.strip())
-
 if not sitemap_locs:
     print("No sitemaps found in index", file=sys.stderr)
     sys.exit(1)
@@ -226,19 +228,18 @@ def process_sitemap(sm_url):
     xml = fetch_xml(sm_url)
     if not xml:
         return {"url": sm_url, "total_urls": 0}
+    # Count unique URLs only; the scraper drops repeats before applying offsets
+    urls = set()
     try:
-        root_sm = ET.fromstring(xml)
+        for loc in iter_sitemap_locs(xml):
+            if is_product_url(loc):
+                urls.add(loc)
+                # Nothing past the cap is ever scheduled, so stop parsing there
+                if MAX_URLS_PER_SITEMAP > 0 and len(urls) >= MAX_URLS_PER_SITEMAP:
+                    break
     except ET.ParseError:
         return {"url": sm_url, "total_urls": 0}
-    urls = []
-    for loc in root_sm.findall(".//ns:loc", ns) or root_sm.findall(".//loc"):
-        if loc.text and ".html" in loc.text and not any(
-            ext in loc.text for ext in [".jpg", ".jpeg", ".png", ".gif", ".webp"]
-        ):
-            urls.append(loc.text.strip())
     total = len(urls)
-    if MAX_URLS_PER_SITEMAP > 0 and total > MAX_URLS_PER_SITEMAP:
-        total = MAX_URLS_PER_SITEMAP
     return {"url": sm_url, "total_urls": total}
 
 worker_count = max(1, min(CHUNK_GEN_WORKERS, len(sitemap_locs)))
@@ -246,7 +247,6 @@ with ThreadPoolExecutor(max_workers=worker_count) as executor:
     futures = [executor.submit(process_sitemap, url) for url in sitemap_locs]
     for future in as_completed(futures):
         sitemap_stats.append(future.result())
-        time.sleep(0.2)  # be polite
 
 # ---------- 3. Generate chunks (one matrix entry per chunk) ----------
 chunks = []
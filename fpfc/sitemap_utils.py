@@ -0,0 +1,50 @@
+"""
+sitemap_utils.py – robots.txt and sitemap parsing shared by generate_chunks.py
+(which plans the chunks) and fp_fc_scraper.py (which scrapes them), so both
+always agree on which sitemaps and URLs count as products.
+"""
+
+import io
+import re
+from xml.etree import ElementTree as ET
+
+# robots.txt directives, matched in one pass over the body. Values stop at
+# whitespace or '<' since FlareSolverr returns the text wrapped in HTML.
+ROBOTS_SITEMAP_RE = re.compile(r"^[ \t]*sitemap:[ \t]*([^\s<]+)", re.IGNORECASE | re.MULTILINE)
+ROBOTS_CRAWL_DELAY_RE = re.compile(r"^[ \t]*crawl-delay:[ \t]*([^\s<]+)", re.IGNORECASE | re.MULTILINE)
+
+SITEMAP_LOC_TAGS = ("{http://www.sitemaps.org/schemas/sitemap/0.9}loc", "loc")
+
+def iter_sitemap_locs(data: str):
+    """Stream <loc> values out of a sitemap or sitemap index.
+
+    Uses iterparse and drops finished elements as it goes, so a 50k-entry
+    sitemap never exists as a full element tree in memory.
+    """
+    root = None
+    for event, elem in ET.iterparse(io.BytesIO(data.encode("utf-8")), events=("start", "end")):
+        if root is None:
+            root = elem
+        if event != "end":
+            continue
+        if elem.tag in SITEMAP_LOC_TAGS:
+            if elem.text:
+                yield elem.text.strip()
+        elif elem is not root:
+            root.clear()
+
+# Sitemap entries we keep: product pages end in .html, image assets are skipped
+IMAGE_EXT_RE = re.compile(r"\.(?:jpe?g|png|gif|webp|bmp|svg)")
+
+def is_product_url(loc: str) -> bool:
+    return ".html" in loc and not IMAGE_EXT_RE.search(loc)
+
+# Nested sitemaps that never list product pages (image/video/CMS/blog/category
+# sitemaps) are skipped at the index so they are not fetched at all
+NON_PRODUCT_SITEMAP_RE = re.compile(
+    r"(?:image|video|cms|blog|categor(?:y|ies))[-_]?sitemap|sitemap[-_]?(?:image|video|cms|blog|categor(?:y|ies))",
+    re.IGNORECASE,
+)
+
+def is_product_sitemap(loc: str) -> bool:
+    return not NON_PRODUCT_SITEMAP_RE.search(loc)
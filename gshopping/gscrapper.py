@@ -65,11 +65,10 @@ def detects_recaptcha(driver):
         if driver.find_elements(By.CLASS_NAME, "rc-imageselect-challenge"):
             print("Puzzle reCAPTCHA detected!")
             return True
-        elif driver.find_elements(By.TAG_NAME, "iframe"):
-            for iframe in driver.find_elements(By.TAG_NAME, "iframe"):
-                if iframe.get_attribute("src") and "recaptcha" in iframe.get_attribute("src"):
-                    print("reCAPTCHA iframe detected!")
-                    return True
+        elif driver.find_elements(By.CSS_SELECTOR, "iframe[src*='recaptcha']"):
+            # Matched by the browser in one call instead of a src read per iframe
+            print("reCAPTCHA iframe detected!")
+            return True
         else:
             print("No reCAPTCHA found.")
             return False
@@ -110,12 +110,10 @@ def detects_recaptcha(driver):
         if driver.find_elements(By.CLASS_NAME, "rc-imageselect-challenge"):
             print("Puzzle reCAPTCHA detected!")
             return True
-        elif driver.find_elements(By.TAG_NAME, "iframe"):
-            for iframe in driver.find_elements(By.TAG_NAME, "iframe"):
-                src = iframe.get_attribute("src")
-                if src and "recaptcha" in src:
-                    print("reCAPTCHA iframe detected!")
-                    return True
+        elif driver.find_elements(By.CSS_SELECTOR, "iframe[src*='recaptcha']"):
+            # Matched by the browser in one call instead of a src read per iframe
+            print("reCAPTCHA iframe detected!")
+            return True
         else:
             print("No reCAPTCHA found.")
             return False
@@ -215,9 +213,13 @@ def download_csv_from_ftp(ftp_host, ftp_user, ftp_pass, ftp_path, remote_filenam
 
 def upload_to_ftp(ftp_host, ftp_user, ftp_pass, ftp_path, local_file, remote_filename):
     """Upload file to FTP server"""
+    return upload_files_to_ftp(ftp_host, ftp_user, ftp_pass, ftp_path, [(local_file, remote_filename)])
+
+def upload_files_to_ftp(ftp_host, ftp_user, ftp_pass, ftp_path, files):
+    """Upload (local_file, remote_filename) pairs to FTP server over a single login"""
+    if not files:
+        return True
     try:
-        print(f"Uploading {remote_filename} to FTP...")
-        
         ftp = ftplib.FTP()
         ftp.connect(ftp_host, 21)
         ftp.login(ftp_user, ftp_pass)
@@ -237,12 +239,20 @@ def upload_to_ftp(ftp_host, ftp_user, ftp_pass, ftp_path, local_file, remote_fil
                         ftp.mkd(current_path)
                         ftp.cwd(current_path)
         
-        with open(local_file, 'rb') as f:
-            ftp.storbinary(f'STOR {remote_filename}', f)
+        # One failed file must not stop the rest of the batch from uploading
+        failed = []
+        for local_file, remote_filename in files:
+            try:
+                print(f"Uploading {remote_filename} to FTP...")
+                with open(local_file, 'rb') as f:
+                    ftp.storbinary(f'STOR {remote_filename}', f, blocksize=1 << 20)
+                print(f"✓ Uploaded {remote_filename} to FTP")
+            except Exception as e:
+                print(f"Error uploading {remote_filename} to FTP: {str(e)}")
+                failed.append(remote_filename)
         
         ftp.quit()
-        print(f"✓ Uploaded {remote_filename} to FTP")
-        return True
+        return not failed
         
     except Exception as e:
         print(f"Error uploading to FTP: {str(e)}")
@@ -674,10 +684,7 @@ def merge_csv_files(file_paths, output_path, sort_columns=None, expected_columns
 
     merged_df = pd.concat(frames, ignore_index=True)
     if expected_columns:
-        for col in expected_columns:
-            if col not in merged_df.columns:
-                merged_df[col] = ""
-        merged_df = merged_df.loc[:, expected_columns]
+        merged_df = merged_df.reindex(columns=expected_columns, fill_value="")
     if sort_columns:
         available_cols = [c for c in sort_columns if c in merged_df.columns]
         if available_cols:
@@ -986,21 +993,14 @@ def run_recursive_pipeline(input_csv, total_chunks, ftp_host, ftp_user, ftp_pass
         )
 
         # Upload round-level merged files only after the full round has finished.
-        if round_product_merged:
-            upload_to_ftp(
-                ftp_host, ftp_user, ftp_pass, ftp_path,
-                round_product_merged, os.path.basename(round_product_merged)
-            )
-        if round_seller_merged:
-            upload_to_ftp(
-                ftp_host, ftp_user, ftp_pass, ftp_path,
-                round_seller_merged, os.path.basename(round_seller_merged)
-            )
-        if round_remaining_merged:
-            upload_to_ftp(
-                ftp_host, ftp_user, ftp_pass, ftp_path,
-                round_remaining_merged, os.path.basename(round_remaining_merged)
-            )
+        upload_files_to_ftp(
+            ftp_host, ftp_user, ftp_pass, ftp_path,
+            [
+                (path, os.path.basename(path))
+                for path in (round_product_merged, round_seller_merged, round_remaining_merged)
+                if path
+            ],
+        )
 
         print(
             f"Round {round_id} summary: products={round_product_rows}, "
@@ -1029,16 +1029,10 @@ def run_recursive_pipeline(input_csv, total_chunks, ftp_host, ftp_user, ftp_pass
         sort_columns=["product_id", "seller"],
     )
 
-    if final_products_file:
-        upload_to_ftp(
-            ftp_host, ftp_user, ftp_pass, ftp_path,
-            final_products_file, os.path.basename(final_products_file)
-        )
-    if final_sellers_file:
-        upload_to_ftp(
-            ftp_host, ftp_user, ftp_pass, ftp_path,
-            final_sellers_file, os.path.basename(final_sellers_file)
-        )
+    upload_files_to_ftp(
+        ftp_host, ftp_user, ftp_pass, ftp_path,
+        [(path, os.path.basename(path)) for path in (final_products_file, final_sellers_file) if path],
+    )
 
     print("\nFinal merge summary:")
     print(f"Final products: {final_product_rows} rows")
@@ -1,5 +1,6 @@
 import argparse
 import ftplib
+import io
 import json
 import os
 import traceback
@@ -9,10 +10,12 @@ from urllib.parse import urlparse
 
 import pandas as pd
 import requests
+import soupsieve
 from bs4 import BeautifulSoup
 
 
-def download_csv_from_ftp(ftp_host, ftp_user, ftp_pass, ftp_path, remote_filename, local_filename):
+def download_csv_from_ftp(ftp_host, ftp_user, ftp_pass, ftp_path, remote_filename):
+    """Download remote_filename into memory; the CSV is only ever read once"""
     try:
         ftp = ftplib.FTP()
         ftp.connect(ftp_host, int(os.getenv("FTP_PORT", 21)))
@@ -22,12 +25,13 @@ def download_csv_from_ftp(ftp_host, ftp_user, ftp_pass, ftp_path, remote_filenam
         if ftp_path and ftp_path != "/":
             ftp.cwd(ftp_path)
 
-        with open(local_filename, "wb") as f:
-            ftp.retrbinary(f"RETR {remote_filename}", f.write)
+        buffer = io.BytesIO()
+        ftp.retrbinary(f"RETR {remote_filename}", buffer.write)
 
         ftp.quit()
-        print(f"✓ Downloaded {remote_filename} to {local_filename}")
-        return local_filename
+        buffer.seek(0)
+        print(f"✓ Downloaded {remote_filename} ({buffer.getbuffer().nbytes} bytes)")
+        return buffer
     except Exception as e:
         print(f"Error downloading from FTP: {str(e)}")
         return None
@@ -51,9 +55,36 @@ def get_text_safe(element):
     return element.get_text(" ", strip=True)
 
 
-def find_first_text(node, selectors):
-    for selector in selectors:
-        found = node.select_one(selector)
+# CSS selectors used on every results page, compiled once; each entry is
+# tried in order and the first match wins
+SELECTORS = {
+    name: [soupsieve.compile(css) for css in css_list]
+    for name, css_list in {
+        "container": [".dURPMd"],
+        "product": [".MtXiu"],
+        "product_name": ["div.gkQHve", "[class*='gkQHve']"],
+        "product_seller": ["span.WJMUdc", "[class*='WJMUdc']"],
+        "offers_grid": ["div[jsname='RSFNod'][data-attrid='organic_offers_grid']"],
+        "offer": [".R5K7Cb"],
+        "store_name": ["div.hP4iBf.gUf0b.uWvFpd", "[class*='hP4iBf']"],
+        "seller_product_name": ["div.Rp8BL", "[class*='Rp8BL']"],
+        "seller_link": ["a.P9159d", "a[href]"],
+        "seller_price": ["div.QcEgce span[aria-hidden='true']", "div.GBgquf span", "[class*='QcEgce'] span"],
+    }.items()
+}
+
+
+def select_first(node, name):
+    for selector in SELECTORS[name]:
+        found = selector.select_one(node)
+        if found:
+            return found
+    return None
+
+
+def find_first_text(node, name):
+    for selector in SELECTORS[name]:
+        found = selector.select_one(node)
         text = get_text_safe(found)
         if text:
             return text
@@ -171,13 +202,13 @@ def extract_product_from_html(html, row):
     }
 
     soup = BeautifulSoup(html, "lxml")
-    mains = soup.select_one(".dURPMd")
+    mains = select_first(soup, "container")
     if not mains:
         result["status"] = "container_not_found"
         result["last_response"] = "Product container not found"
         return result
 
-    products = mains.select(".MtXiu")
+    products = SELECTORS["product"][0].select(mains)
     if not products:
         result["status"] = "no_products"
         result["last_response"] = "No products found"
@@ -185,8 +216,8 @@ def extract_product_from_html(html, row):
 
     chosen = None
     for product in products:
-        product_name = find_first_text(product, ["div.gkQHve", "[class*='gkQHve']"])
-        seller = find_first_text(product, ["span.WJMUdc", "[class*='WJMUdc']"])
+        product_name = find_first_text(product, "product_name")
+        seller = find_first_text(product, "product_seller")
         cid = product.get("id", "")
 
         if ("set" in keyword.lower() and "set" not in product_name.lower()) or (
@@ -210,23 +241,23 @@ def extract_product_from_html(html, row):
     result["seller"] = chosen["seller"]
     result["cid"] = chosen["cid"]
 
-    offers_grid = soup.select_one("div[jsname='RSFNod'][data-attrid='organic_offers_grid']")
+    offers_grid = select_first(soup, "offers_grid")
     if not offers_grid:
         result["status"] = "no_offers_found"
         result["last_response"] = "Offers grid not found"
         return result
 
-    offer_elements = offers_grid.select(".R5K7Cb")
+    offer_elements = SELECTORS["offer"][0].select(offers_grid)
     competitors = []
     for offer in offer_elements:
-        store_name = find_first_text(offer, ["div.hP4iBf.gUf0b.uWvFpd", "[class*='hP4iBf']"]) or "N/A"
-        seller_product_name = find_first_text(offer, ["div.Rp8BL", "[class*='Rp8BL']"]) or "N/A"
+        store_name = find_first_text(offer, "store_name") or "N/A"
+        seller_product_name = find_first_text(offer, "seller_product_name") or "N/A"
 
-        seller_link = offer.select_one("a.P9159d") or offer.select_one("a[href]")
+        seller_link = select_first(offer, "seller_link")
         seller_url = (seller_link.get("href", "") if seller_link else "") or "N/A"
 
         seller_price = (
-            find_first_text(offer, ["div.QcEgce span[aria-hidden='true']", "div.GBgquf span", "[class*='QcEgce'] span"])
+            find_first_text(offer, "seller_price")
             or "N/A"
         )
 
@@ -454,8 +485,8 @@ def main():
         print("Error: FTP credentials not found in environment variables")
         raise SystemExit(1)
 
-    input_csv = "input.csv"
-    if not download_csv_from_ftp(ftp_host, ftp_user, ftp_pass, ftp_path, args.input_file, input_csv):
+    input_csv = download_csv_from_ftp(ftp_host, ftp_user, ftp_pass, ftp_path, args.input_file)
+    if input_csv is None:
         raise SystemExit(1)
 
     try:
@@ -476,11 +507,6 @@ def main():
         print(f"Error: {e}")
         traceback.print_exc()
         raise SystemExit(1)
-    finally:
-        try:
-            os.remove(input_csv)
-        except Exception:
-            pass
 
 
 if __name__ == "__main__":
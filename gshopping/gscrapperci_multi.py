@@ -49,12 +49,6 @@ except ImportError:
 file_lock = Lock()
 stats_lock = Lock()
 
-# Global counters
-processed_count = 0
-success_count = 0
-failed_count = 0
-captcha_failed_count = 0
-
 def setup_driver(proxy=None):
     """Setup Chrome driver with optional proxy"""
     time.sleep(2)
@@ -103,12 +97,10 @@ def detects_recaptcha(driver):
         if driver.find_elements(By.CLASS_NAME, "rc-imageselect-challenge"):
             print("Puzzle reCAPTCHA detected!")
             return True
-        elif driver.find_elements(By.TAG_NAME, "iframe"):
-            for iframe in driver.find_elements(By.TAG_NAME, "iframe"):
-                src = iframe.get_attribute("src")
-                if src and "recaptcha" in src:
-                    print("reCAPTCHA iframe detected!")
-                    return True
+        elif driver.find_elements(By.CSS_SELECTOR, "iframe[src*='recaptcha']"):
+            # Matched by the browser in one call instead of a src read per iframe
+            print("reCAPTCHA iframe detected!")
+            return True
         else:
             return False
     except Exception as e:
@@ -259,9 +251,9 @@ def normalize_url_path_slug(raw_url):
     except:
         return ""
 
-def scrape_product(product_data, proxy=None):
-    """Scrape individual product from Google Shopping - to be run in parallel"""
-    global processed_count, success_count, failed_count, captcha_failed_count
+def scrape_product(product_data, stats, proxy=None):
+    """Scrape individual product from Google Shopping - to be run in parallel.
+    stats is the chunk's counter dict, updated under stats_lock"""
     
     product_id = product_data['product_id']
     web_id = product_data['web_id']
@@ -281,8 +273,8 @@ def scrape_product(product_data, proxy=None):
         captcha_result = handle_captcha(driver, url)
         if captcha_result == "failed":
             with stats_lock:
-                captcha_failed_count += 1
-                failed_count += 1
+                stats['captcha_failed'] += 1
+                stats['failed'] += 1
             
             result = {
                 'product_id': product_id,
@@ -337,7 +329,7 @@ def scrape_product(product_data, proxy=None):
             result['last_response'] = f"Product container not found: {str(e)}"
             result['status'] = "container_not_found"
             with stats_lock:
-                failed_count += 1
+                stats['failed'] += 1
             return result, product_data
         
         # Find products in container
@@ -346,7 +338,7 @@ def scrape_product(product_data, proxy=None):
             result['last_response'] = "No products found in container"
             result['status'] = "no_products"
             with stats_lock:
-                failed_count += 1
+                stats['failed'] += 1
             return result, product_data
         
         # Process first matching product
@@ -383,7 +375,7 @@ def scrape_product(product_data, proxy=None):
             result['last_response'] = "No matching product found"
             result['status'] = "no_match"
             with stats_lock:
-                failed_count += 1
+                stats['failed'] += 1
             return result, product_data
         
         # Click on product if CID exists
@@ -540,17 +532,17 @@ def scrape_product(product_data, proxy=None):
             })
             
             with stats_lock:
-                success_count += 1
+                stats['success'] += 1
             
         except Exception as e:
             result['status'] = 'no_offers_found'
             result['last_response'] = f'No offers found: {str(e)}'
             with stats_lock:
-                failed_count += 1
+                stats['failed'] += 1
         
         with stats_lock:
-            processed_count += 1
-            print(f"\n[Thread {thread_id}] Progress: {processed_count} processed, {success_count} successful, {failed_count} failed, {captcha_failed_count} captcha failed")
+            stats['processed'] += 1
+            print(f"\n[Thread {thread_id}] Progress: {stats['processed']} processed, {stats['success']} successful, {stats['failed']} failed, {stats['captcha_failed']} captcha failed")
         
         return result, product_data
         
@@ -558,7 +550,7 @@ def scrape_product(product_data, proxy=None):
         print(f"[Thread {thread_id}] Error scraping product {product_id}: {str(e)}")
         traceback.print_exc()
         with stats_lock:
-            failed_count += 1
+            stats['failed'] += 1
         
         result = {
             'product_id': product_id,
@@ -683,14 +675,9 @@ def split_csv(input_csv, output_dir, chunk_id, total_chunks):
 
 def process_chunk_parallel(chunk_file, chunk_id, total_chunks, max_workers=None):
     """Process a chunk of products in parallel"""
-    global processed_count, success_count, failed_count, captcha_failed_count
-    
     try:
-        # Reset counters
-        processed_count = 0
-        success_count = 0
-        failed_count = 0
-        captcha_failed_count = 0
+        # Counters for this chunk, shared with the worker threads
+        stats = {'processed': 0, 'success': 0, 'failed': 0, 'captcha_failed': 0}
         
         # Get FTP credentials from environment
         ftp_host = os.getenv('FTP_HOST')
@@ -737,7 +724,7 @@ def process_chunk_parallel(chunk_file, chunk_id, total_chunks, max_workers=None)
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Scraper") as executor:
             # Submit all tasks
             future_to_product = {
-                executor.submit(scrape_product, product_data): product_data 
+                executor.submit(scrape_product, product_data, stats): product_data 
                 for product_data in products_to_process
             }
             
@@ -758,14 +745,15 @@ def process_chunk_parallel(chunk_file, chunk_id, total_chunks, max_workers=None)
                     
                 except concurrent.futures.TimeoutError:
                     print(f"Timeout processing product {product_data['product_id']}")
+                    with stats_lock:
+                        stats['failed'] += 1
                     with file_lock:
-                        failed_count += 1
                         # Add to remaining for retry
                         remaining_results.append(product_data)
                 except Exception as e:
                     print(f"Error processing product {product_data['product_id']}: {str(e)}")
-                    with file_lock:
-                        failed_count += 1
+                    with stats_lock:
+                        stats['failed'] += 1
         
         elapsed_time = time.time() - start_time
         print(f"\nParallel processing completed in {elapsed_time:.2f} seconds")
@@ -840,7 +828,7 @@ def process_chunk_parallel(chunk_file, chunk_id, total_chunks, max_workers=None)
         #     upload_to_ftp(ftp_host, ftp_user, ftp_pass, ftp_path, csv2_path, csv2_filename)
         
         print(f"\n✓ Chunk {chunk_id} processing completed")
-        print(f"  Total: {processed_count} | Success: {success_count} | Failed: {failed_count} | Captcha Failed: {captcha_failed_count}")
+        print(f"  Total: {stats['processed']} | Success: {stats['success']} | Failed: {stats['failed']} | Captcha Failed: {stats['captcha_failed']}")
         return True
         
     except Exception as e:
@@ -1,5 +1,13 @@
+import io
+import re
+import hashlib
 import time
-import os
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import urllib.error
 import urllib.request
 import random
 import pydub
@@ -10,11 +18,21 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException
 import logging
 
+try:
+    import speech_recognition as sr
+except ImportError:
+    sr = None
+
+try:
+    import miniaudio
+except ImportError:
+    miniaudio = None
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-recaptcha_words = [
+RECAPTCHA_WORDS = (
     "apple tree", "blue sky", "silver coin", "happy child", "gold star",
     "fast car", "river bank", "mountain peak", "red house", "sun flower",
     "deep ocean", "bright moon", "green grass", "snow fall", "strong wind",
@@ -35,38 +53,159 @@ recaptcha_words = [
     "boiling water", "freezing air", "burning wood", "echoing voice", "howling wind",
     "glowing candle", "rustling leaves", "dancing flame", "rattling chains", "splashing water",
     "twisting road", "swinging door", "glistening snow", "pouring rain", "shaking ground"
-]
+)
 
-def voicereco(AUDIO_FILE):
-    import speech_recognition as sr
+def _fallback_phrase():
+    """Random phrase to submit when the clip cannot be recognized"""
+    return random.choice(RECAPTCHA_WORDS)
+
+# Upper bound for explicit waits; WebDriverWait returns as soon as the
+# condition holds, so this only matters when the page is actually slow
+WAIT_TIMEOUT = 10
+
+# Recognized text keyed by a hash of the decoded clip. reCAPTCHA re-serves
+# identical clips within a session, and a hit skips the Google round trip.
+RECOGNITION_CACHE_SIZE = 256
+_recognition_cache = OrderedDict()
+_recognition_cache_lock = threading.Lock()
+
+# Decoded clips are raw signed 16-bit little-endian mono PCM at this rate, so
+# they can be handed to sr.AudioData without a RIFF header to parse
+PCM_SAMPLE_RATE = 16000
+PCM_SAMPLE_WIDTH = 2
+
+# One recognizer for the whole process instead of one per clip. Its
+# operation_timeout bounds the Google request, which otherwise has none
+SPEECH_TIMEOUT = 10
+_recognizer = sr.Recognizer() if sr else None
+if _recognizer is not None:
+    _recognizer.operation_timeout = SPEECH_TIMEOUT
+
+# Speech API answers that will not change on a retry (forbidden key, quota
+# exhausted); submitting a guessed phrase after these only burns a challenge
+DECISIVE_SPEECH_STATUS = {403, 429}
+
+def voicereco(pcm_bytes):
+    if sr is None:
+        logger.error("❌ speech_recognition is not installed")
+        return _fallback_phrase()
+
+    key = hashlib.blake2b(pcm_bytes, digest_size=16).hexdigest()
+    with _recognition_cache_lock:
+        cached = _recognition_cache.get(key)
+        if cached is not None:
+            _recognition_cache.move_to_end(key)
+    if cached is not None:
+        logger.info(f"📝 Extracted Text (cached): {cached}")
+        return cached
 
-    recognizer = sr.Recognizer()
-    
     try:
-        with sr.AudioFile(AUDIO_FILE) as source:
-            logger.info("🔄 Processing audio file...")
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            audio = recognizer.record(source)
+        logger.info("🔄 Processing audio...")
+        audio = sr.AudioData(pcm_bytes, PCM_SAMPLE_RATE, PCM_SAMPLE_WIDTH)
 
-            try:
-                text = recognizer.recognize_google(audio)
-                logger.info(f"📝 Extracted Text: {text}")
-                return text
-            except sr.UnknownValueError:
-                random_text = random.choice(recaptcha_words)
-                logger.warning(f"❌ Could not understand audio, using fallback: {random_text}")
-                return random_text
-            except sr.RequestError as e:
-                logger.error(f"❌ Speech recognition request error: {e}")
-                random_text = random.choice(recaptcha_words)
-                return random_text
+        try:
+            text = _recognizer.recognize_google(audio)
+            logger.info(f"📝 Extracted Text: {text}")
+            with _recognition_cache_lock:
+                _recognition_cache[key] = text
+                if len(_recognition_cache) > RECOGNITION_CACHE_SIZE:
+                    _recognition_cache.popitem(last=False)
+            return text
+        except sr.UnknownValueError:
+            random_text = _fallback_phrase()
+            logger.warning(f"❌ Could not understand audio, using fallback: {random_text}")
+            return random_text
+        except sr.RequestError as e:
+            logger.error(f"❌ Speech recognition request error: {e}")
+            # recognize_google raises this while handling urllib's HTTPError,
+            # which carries the status code
+            if getattr(e.__context__, "code", None) in DECISIVE_SPEECH_STATUS:
+                return None
+            random_text = _fallback_phrase()
+            return random_text
     except Exception as e:
         logger.error(f"❌ Error processing audio file: {e}")
-        random_text = random.choice(recaptcha_words)
+        random_text = _fallback_phrase()
         return random_text
 
-def download_audio_file(src, mp3_path, wav_path):
-    """Download and convert audio file with retries"""
+# Download chunk size: large enough to keep syscalls few, small enough that
+# the clip streams into ffmpeg while it is still arriving
+AUDIO_CHUNK_SIZE = 128 * 1024
+
+# Per-socket-operation timeout for the clip download, so a stalled transfer
+# fails (and is retried) instead of holding an audio worker forever
+AUDIO_DOWNLOAD_TIMEOUT = 15
+
+FFMPEG_PCM_CMD = [
+    "ffmpeg", "-loglevel", "error", "-i", "pipe:0",
+    "-f", "s16le", "-ar", str(PCM_SAMPLE_RATE), "-ac", "1", "pipe:1",
+]
+
+def decode_mp3_in_process(mp3_bytes):
+    """Decode an MP3 to 16 kHz mono PCM bytes without spawning a subprocess.
+
+    Uses miniaudio when it is installed and pydub (ffprobe + ffmpeg) otherwise.
+    """
+    if miniaudio is None:
+        segment = pydub.AudioSegment.from_file(io.BytesIO(mp3_bytes))
+        segment = segment.set_frame_rate(PCM_SAMPLE_RATE).set_channels(1).set_sample_width(PCM_SAMPLE_WIDTH)
+        return segment.raw_data
+
+    decoded = miniaudio.decode(mp3_bytes, output_format=miniaudio.SampleFormat.SIGNED16,
+                               nchannels=1, sample_rate=PCM_SAMPLE_RATE)
+    return decoded.samples.tobytes()
+
+def stream_to_pcm(response):
+    """Stream an MP3 HTTP body into ffmpeg and return (mp3_size, pcm_bytes).
+
+    The body is fed to ffmpeg in AUDIO_CHUNK_SIZE pieces from a helper thread
+    while the decoded 16 kHz mono PCM is read back, so decoding overlaps the
+    download and the MP3 is never held in memory or written to disk. Falls
+    back to decode_mp3_in_process when ffmpeg isn't on PATH.
+    """
+    try:
+        proc = subprocess.Popen(FFMPEG_PCM_CMD, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    except FileNotFoundError:
+        logger.warning("ffmpeg not on PATH, decoding in process")
+        mp3_buf = io.BytesIO()
+        shutil.copyfileobj(response, mp3_buf, length=AUDIO_CHUNK_SIZE)
+        mp3_size = mp3_buf.tell()
+        if mp3_size < 1000:  # not audio; let the caller report it
+            return mp3_size, b""
+        return mp3_size, decode_mp3_in_process(mp3_buf.getvalue())
+
+    fed = {"size": 0, "error": None}
+
+    def feed():
+        try:
+            for chunk in iter(lambda: response.read(AUDIO_CHUNK_SIZE), b""):
+                proc.stdin.write(chunk)
+                fed["size"] += len(chunk)
+        except BrokenPipeError:
+            pass  # ffmpeg gave up on the input; its exit code says why
+        except Exception as e:
+            fed["error"] = e
+        finally:
+            proc.stdin.close()
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    pcm_bytes = proc.stdout.read()
+    feeder.join()
+    returncode = proc.wait()
+
+    if fed["error"] is not None:
+        raise fed["error"]
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, FFMPEG_PCM_CMD)
+    return fed["size"], pcm_bytes
+
+def download_audio_file(src):
+    """Download the captcha clip and return it as decoded PCM bytes.
+
+    Only network-level failures and 5xx answers are retried, with
+    exponential backoff; a 4xx or an undecodable clip fails immediately.
+    """
     max_retries = 2
     for attempt in range(max_retries):
         try:
@@ -88,67 +227,116 @@ def download_audio_file(src, mp3_path, wav_path):
             
             req = urllib.request.Request(src, headers=headers)
             
-            with urllib.request.urlopen(req) as response:
-                with open(mp3_path, 'wb') as f:
-                    f.write(response.read())
+            with urllib.request.urlopen(req, timeout=AUDIO_DOWNLOAD_TIMEOUT) as response:
+                try:
+                    file_size, pcm_bytes = stream_to_pcm(response)
+                except subprocess.CalledProcessError as e:
+                    logger.error(f"❌ Audio conversion error: {e}")
+                    return None
             
             logger.info("✅ Audio file downloaded.")
-            
-            # Check file size
-            file_size = os.path.getsize(mp3_path)
             logger.info(f"Audio file size: {file_size} bytes")
             
             if file_size < 1000:  # Too small, probably not an audio file
                 logger.error(f"File too small ({file_size} bytes), probably not audio")
-                return False
+                return None
             
-            # Convert MP3 to WAV
-            try:
-                sound = pydub.AudioSegment.from_mp3(mp3_path)
-                sound.export(wav_path, format="wav")
-                logger.info("✅ Audio file converted to WAV.")
-                return True
-            except Exception as e:
-                logger.error(f"❌ Audio conversion error: {e}")
-                # Try alternative format
-                try:
-                    sound = pydub.AudioSegment.from_file(mp3_path)
-                    sound.export(wav_path, format="wav")
-                    logger.info("✅ Audio file converted to WAV (alternative method).")
-                    return True
-                except Exception as e2:
-                    logger.error(f"❌ Alternative conversion also failed: {e2}")
-                    return False
+            logger.info("✅ Audio decoded to PCM.")
+            return pcm_bytes
                     
-        except Exception as e:
+        except urllib.error.HTTPError as e:
+            logger.error(f"❌ Audio download error (attempt {attempt + 1}): HTTP {e.code}")
+            if e.code < 500:
+                return None
+        except (urllib.error.URLError, OSError) as e:
             logger.error(f"❌ Audio download error (attempt {attempt + 1}): {e}")
-            if attempt < max_retries - 1:
-                time.sleep(2)
-            else:
-                return False
+        except Exception as e:
+            logger.error(f"❌ Audio download error: {e}")
+            return None
+        
+        if attempt < max_retries - 1:
+            time.sleep(2 ** attempt)
+    return None
+
+# Download, decode and recognition run here while the Selenium thread keeps
+# waiting on the DOM. ffmpeg decoding already overlaps the download inside
+# stream_to_pcm; the pool is shared by the scraper threads in gscrapperci_multi
+_audio_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="captcha-audio")
+
+# Longest the solve waits on download + recognition: both download attempts
+# with their backoff, plus the speech request
+RECOGNITION_TIMEOUT = 60
+
+def download_and_recognize(src):
+    """Download the clip at src and return the recognized text, or None if the download failed"""
+    pcm_bytes = download_audio_file(src)
+    if not pcm_bytes:
+        return None
+    return voicereco(pcm_bytes)
+
+# Collects src/id/visibility for every <audio> and <audio><source> in one
+# WebDriver round trip instead of one get_attribute call per attribute
+AUDIO_SOURCES_JS = """
+    var sources = [];
+    var audios = document.getElementsByTagName('audio');
+    for (var i = 0; i < audios.length; i++) {
+        var src = audios[i].src;
+        if (src && src.trim() !== '') {
+            sources.push({src: src, id: audios[i].id, hidden: audios[i].style.display === 'none'});
+        }
+    }
+    var sourceTags = document.querySelectorAll('audio source');
+    for (var j = 0; j < sourceTags.length; j++) {
+        var src = sourceTags[j].src;
+        if (src && src.trim() !== '') {
+            sources.push({src: src, id: 'source-tag-' + j, hidden: false});
+        }
+    }
+    return sources;
+"""
+
+# Script bundles (recaptcha__en.js and friends) that sometimes show up where
+# the audio src is expected
+_JS_RE = re.compile(r'\.js($|\?)')
+
+# Audio URLs embedded in the challenge page source, most specific first
+AUDIO_URL_PATTERNS = [
+    re.compile(r'https://www\.google\.com/recaptcha/api2/[^"\']*\.mp3[^"\']*', re.IGNORECASE),
+    re.compile(r'https://www\.google\.com/recaptcha/api2/[^"\']*audio[^"\']*', re.IGNORECASE),
+    re.compile(r'https://[^"\']*recaptcha[^"\']*audio[^"\']*', re.IGNORECASE),
+    re.compile(r'src=["\'][^"\']*\.mp3[^"\']*["\']', re.IGNORECASE),
+]
+_MP3_RE = re.compile(r'\.mp3', re.IGNORECASE)
+_RECAPTCHA_RE = re.compile(r'recaptcha', re.IGNORECASE)
+
+# Matched against iframe src + title + name
+_RECAPTCHA_FRAME_RE = re.compile(r'captcha', re.IGNORECASE)
+_CHALLENGE_FRAME_RE = re.compile(r'challenge|bframe', re.IGNORECASE)
+
+# Returns [element, src, title, name] for every iframe in one round trip
+IFRAMES_JS = """
+    return Array.prototype.map.call(document.getElementsByTagName('iframe'), function (f) {
+        return [f, f.src || '', f.title || '', f.name || ''];
+    });
+"""
+
+def list_iframes(driver):
+    """All iframes on the current document with their src/title/name"""
+    return driver.execute_script(IFRAMES_JS) or []
 
 def get_audio_source(driver):
     """Get the actual audio source URL from reCAPTCHA with multiple approaches"""
     try:
-        # Wait for audio to load
-        time.sleep(3)
-        
         logger.info("Looking for audio source using multiple methods...")
         
-        # METHOD 1: Look for audio element directly
-        audio_elements = driver.find_elements(By.TAG_NAME, "audio")
-        logger.info(f"Found {len(audio_elements)} audio elements")
+        # METHOD 1: Read every audio/source src in a single script call
+        audio_sources = driver.execute_script(AUDIO_SOURCES_JS) or []
+        logger.info(f"Found {len(audio_sources)} audio sources")
         
-        for i, audio in enumerate(audio_elements):
-            try:
-                src = audio.get_attribute("src") or ""
-                id_attr = audio.get_attribute("id") or ""
-                
-                if src and not src.endswith('.js'):
-                    logger.info(f"✅ Found audio element {i}: id='{id_attr}', src='{src[:80]}...'")
-                    return src
-            except:
-                continue
+        for source in audio_sources:
+            if not _JS_RE.search(source['src']):
+                logger.info(f"✅ Found audio element: id='{source['id']}', src='{source['src'][:80]}...'")
+                return source['src']
         
         # METHOD 2: Look for iframe within iframe (nested structure)
         logger.info("Checking for nested iframes...")
@@ -160,13 +348,10 @@ def get_audio_source(driver):
                 logger.info(f"Switched to nested frame {frame_idx}")
                 
                 # Look for audio in nested frame
-                nested_audio = driver.find_elements(By.TAG_NAME, "audio")
-                for audio in nested_audio:
-                    src = audio.get_attribute("src") or ""
-                    if src:
-                        logger.info(f"✅ Found audio in nested frame: {src[:80]}...")
-                        driver.switch_to.parent_frame()  # Go back one level
-                        return src
+                for source in driver.execute_script(AUDIO_SOURCES_JS) or []:
+                    logger.info(f"✅ Found audio in nested frame: {source['src'][:80]}...")
+                    driver.switch_to.parent_frame()  # Go back one level
+                    return source['src']
                 
                 driver.switch_to.parent_frame()  # Go back to challenge frame
             except Exception as e:
@@ -174,65 +359,16 @@ def get_audio_source(driver):
                 driver.switch_to.default_content()
                 driver.switch_to.frame(driver.find_element(By.TAG_NAME, "iframe"))
         
-        # METHOD 3: Use JavaScript to find all audio sources
-        logger.info("Using JavaScript to find audio sources...")
-        audio_sources = driver.execute_script("""
-            // Find all audio elements in the entire document
-            var audios = document.getElementsByTagName('audio');
-            var sources = [];
-            
-            for (var i = 0; i < audios.length; i++) {
-                var src = audios[i].src;
-                if (src && src.trim() !== '') {
-                    sources.push({
-                        src: src,
-                        id: audios[i].id,
-                        hidden: audios[i].style.display === 'none'
-                    });
-                }
-            }
-            
-            // Also check for source tags within audio elements
-            var sourceTags = document.querySelectorAll('audio source');
-            for (var j = 0; j < sourceTags.length; j++) {
-                var src = sourceTags[j].src;
-                if (src && src.trim() !== '') {
-                    sources.push({
-                        src: src,
-                        id: 'source-tag-' + j,
-                        hidden: false
-                    });
-                }
-            }
-            
-            return sources;
-        """)
-        
-        if audio_sources:
-            logger.info(f"JavaScript found {len(audio_sources)} audio sources")
-            for source in audio_sources:
-                logger.info(f"JS Source: {source['src'][:100]}...")
-                if source['src'] and not source['src'].endswith('.js'):
-                    return source['src']
-        
-        # METHOD 4: Try to extract from page source
+        # METHOD 3: Try to extract from page source
         logger.info("Checking page source for audio URLs...")
         page_source = driver.page_source
         
         # Look for common audio URL patterns
-        import re
-        patterns = [
-            r'https://www\.google\.com/recaptcha/api2/[^"\']*\.mp3[^"\']*',
-            r'https://www\.google\.com/recaptcha/api2/[^"\']*audio[^"\']*',
-            r'https://[^"\']*recaptcha[^"\']*audio[^"\']*',
-            r'src=["\'][^"\']*\.mp3[^"\']*["\']',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, page_source, re.IGNORECASE)
+        for pattern in AUDIO_URL_PATTERNS:
+            matches = pattern.findall(page_source)
             if matches:
                 for match in matches:
-                    if '.mp3' in match.lower() and 'recaptcha' in match.lower():
+                    if _MP3_RE.search(match) and _RECAPTCHA_RE.search(match):
                         # Clean up the URL
                         url = match
                         if url.startswith('src='):
@@ -253,34 +389,26 @@ def solve_recaptcha_audio(driver):
     """
     try:
         logger.info("Attempting to solve captcha...")
-        time.sleep(2)
         
         # First, ensure we're on the main content
         driver.switch_to.default_content()
         
         # Find all iframes
-        frames = driver.find_elements(By.TAG_NAME, "iframe")
+        frames = list_iframes(driver)
         logger.info(f"Found {len(frames)} iframes on page")
         
         # Look for recaptcha frame by title, src, or name
         recaptcha_frame = None
         recaptcha_frame_index = -1
         
-        for i, frame in enumerate(frames):
-            try:
-                src = frame.get_attribute("src") or ""
-                title = frame.get_attribute("title") or ""
-                name = frame.get_attribute("name") or ""
-                
-                logger.info(f"Frame {i}: src={src[:50]}..., title={title}, name={name}")
-                
-                if any(x in (src + title + name).lower() for x in ["recaptcha", "captcha"]):
-                    recaptcha_frame = frame
-                    recaptcha_frame_index = i
-                    logger.info(f"✅ Found recaptcha frame at index {i}")
-                    break
-            except:
-                continue
+        for i, (frame, src, title, name) in enumerate(frames):
+            logger.info(f"Frame {i}: src={src[:50]}..., title={title}, name={name}")
+            
+            if _RECAPTCHA_FRAME_RE.search(src + title + name):
+                recaptcha_frame = frame
+                recaptcha_frame_index = i
+                logger.info(f"✅ Found recaptcha frame at index {i}")
+                break
         
         if not recaptcha_frame:
             logger.info("No recaptcha frame found, might already be solved")
@@ -288,9 +416,8 @@ def solve_recaptcha_audio(driver):
         
         # Switch to recaptcha frame
         try:
-            driver.switch_to.frame(recaptcha_frame)
+            WebDriverWait(driver, WAIT_TIMEOUT).until(EC.frame_to_be_available_and_switch_to_it(recaptcha_frame))
             logger.info(f"Switched to recaptcha frame {recaptcha_frame_index}")
-            time.sleep(2)
         except Exception as e:
             logger.error(f"Failed to switch to recaptcha frame: {e}")
             driver.switch_to.default_content()
@@ -298,6 +425,13 @@ def solve_recaptcha_audio(driver):
         
         # Click checkbox using JavaScript for reliability
         try:
+            try:
+                WebDriverWait(driver, WAIT_TIMEOUT).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, ".recaptcha-checkbox, #recaptcha-anchor"))
+                )
+            except TimeoutException:
+                pass
+            
             # Try multiple selectors
             selectors = [
                 ".recaptcha-checkbox-border",
@@ -324,7 +458,6 @@ def solve_recaptcha_audio(driver):
             if checkbox:
                 driver.execute_script("arguments[0].click();", checkbox)
                 logger.info("✅ Clicked reCAPTCHA checkbox")
-                time.sleep(4)  # Give time for challenge to load
             else:
                 logger.error("❌ Could not find checkbox element")
                 driver.switch_to.default_content()
@@ -335,27 +468,24 @@ def solve_recaptcha_audio(driver):
             driver.switch_to.default_content()
             return "quit"
         
-        # Switch back to default and look for challenge
+        # Switch back to default and wait for the challenge frame to be attached
         driver.switch_to.default_content()
-        time.sleep(3)
+        try:
+            WebDriverWait(driver, WAIT_TIMEOUT).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "iframe[src*='bframe'], iframe[title*='challenge']"))
+            )
+        except TimeoutException:
+            pass
         
         # Look for challenge iframe - it might be a new one
         challenge_frame = None
-        frames = driver.find_elements(By.TAG_NAME, "iframe")
         
-        for i, frame in enumerate(frames):
-            try:
-                src = frame.get_attribute("src") or ""
-                title = frame.get_attribute("title") or ""
-                name = frame.get_attribute("name") or ""
-                
-                # Look for challenge indicators
-                if any(x in (src + title + name).lower() for x in ["challenge", "bframe", "recaptcha/api2/bframe"]):
-                    challenge_frame = frame
-                    logger.info(f"✅ Found challenge frame at index {i}: {src[:50]}...")
-                    break
-            except:
-                continue
+        for i, (frame, src, title, name) in enumerate(list_iframes(driver)):
+            # Look for challenge indicators
+            if _CHALLENGE_FRAME_RE.search(src + title + name):
+                challenge_frame = frame
+                logger.info(f"✅ Found challenge frame at index {i}: {src[:50]}...")
+                break
         
         if not challenge_frame:
             logger.info("No challenge frame found, CAPTCHA might be solved")
@@ -363,9 +493,8 @@ def solve_recaptcha_audio(driver):
         
         # Switch to challenge frame
         try:
-            driver.switch_to.frame(challenge_frame)
+            WebDriverWait(driver, WAIT_TIMEOUT).until(EC.frame_to_be_available_and_switch_to_it(challenge_frame))
             logger.info("Switched to challenge frame")
-            time.sleep(3)
         except Exception as e:
             logger.error(f"Failed to switch to challenge frame: {e}")
             driver.switch_to.default_content()
@@ -373,16 +502,15 @@ def solve_recaptcha_audio(driver):
         
         # Click audio challenge button
         try:
-            # Wait for page to load
-            time.sleep(2)
-            
             # Try multiple ways to find audio button
             audio_button = None
             
-            # Method 1: By ID
+            # Method 1: By ID, polling until the challenge has rendered it
             try:
-                audio_button = driver.find_element(By.ID, "recaptcha-audio-button")
-            except:
+                audio_button = WebDriverWait(driver, WAIT_TIMEOUT).until(
+                    EC.element_to_be_clickable((By.ID, "recaptcha-audio-button"))
+                )
+            except TimeoutException:
                 pass
             
             # Method 2: By title
@@ -409,7 +537,12 @@ def solve_recaptcha_audio(driver):
             if audio_button:
                 driver.execute_script("arguments[0].click();", audio_button)
                 logger.info("✅ Clicked audio challenge button")
-                time.sleep(5)  # Wait longer for audio to load
+                try:
+                    WebDriverWait(driver, WAIT_TIMEOUT).until(
+                        EC.presence_of_element_located((By.ID, "audio-source"))
+                    )
+                except TimeoutException:
+                    logger.warning("audio-source element did not appear, trying other methods")
             else:
                 logger.error("❌ Could not find audio button")
                 driver.switch_to.default_content()
@@ -420,17 +553,11 @@ def solve_recaptcha_audio(driver):
             driver.switch_to.default_content()
             return "quit"
         
-        # Get audio source URL with retry
-        audio_src = None
-        for attempt in range(1):
-            logger.info(f"Attempt {attempt + 1}/3 to get audio source...")
-            audio_src = get_audio_source(driver)
-            if audio_src:
-                break
-            time.sleep(2)
+        # Get audio source URL; a reload is the only retry worth making
+        audio_src = get_audio_source(driver)
         
         if not audio_src:
-            logger.error("❌ Could not get audio source URL after multiple attempts")
+            logger.error("❌ Could not get audio source URL")
             
             # Try to reload audio
             try:
@@ -447,33 +574,26 @@ def solve_recaptcha_audio(driver):
                 return "quit"
         
         # Validate it's actually an audio URL
-        if audio_src and (audio_src.endswith('.js') or 'recaptcha__en.js' in audio_src):
+        if audio_src and _JS_RE.search(audio_src):
             logger.error(f"❌ Got JavaScript file instead of audio: {audio_src[:100]}...")
             driver.switch_to.default_content()
             return "quit"
         
-        # Download and process audio
-        timestamp = int(time.time())
-        mp3_path = os.path.join(os.getcwd(), f"captcha_audio_{timestamp}.mp3")
-        wav_path = os.path.join(os.getcwd(), f"captcha_audio_{timestamp}.wav")
-        
+        # Download, decode and recognize in the background while the
+        # response box is located below
         logger.info(f"Downloading audio from: {audio_src[:100]}...")
-        if not download_audio_file(audio_src, mp3_path, wav_path):
-            logger.error("❌ Failed to download audio file")
-            driver.switch_to.default_content()
-            return "quit"
-        
-        # Recognize text from audio
-        captcha_text = voicereco(wav_path)
-        if not captcha_text:
-            logger.error("❌ Failed to recognize audio")
-            driver.switch_to.default_content()
-            return "quit"
+        recognition = _audio_executor.submit(download_and_recognize, audio_src)
         
         # Enter the response
         try:
             # Find response input box
             response_box = None
+            try:
+                WebDriverWait(driver, WAIT_TIMEOUT).until(
+                    EC.presence_of_element_located((By.ID, "audio-response"))
+                )
+            except TimeoutException:
+                pass
             response_selectors = [
                 "#audio-response",
                 "input[type='text']",
@@ -495,21 +615,25 @@ def solve_recaptcha_audio(driver):
                 except:
                     pass
             
+            try:
+                captcha_text = recognition.result(timeout=RECOGNITION_TIMEOUT)
+            except FutureTimeoutError:
+                logger.error(f"❌ Audio download/recognition timed out after {RECOGNITION_TIMEOUT}s")
+                recognition.cancel()
+                captcha_text = None
+            if not captcha_text:
+                logger.error("❌ Failed to download or recognize audio")
+                driver.switch_to.default_content()
+                return "quit"
+            
             if response_box:
-                # Clear and enter text
+                # Clear, then type and submit in a single send_keys call
                 response_box.clear()
-                time.sleep(0.5)
                 
-                # Type character by character
                 captcha_text = captcha_text.lower().strip()
                 logger.info(f"Entering response: {captcha_text}")
                 
-                for ch in captcha_text:
-                    response_box.send_keys(ch)
-                    time.sleep(random.uniform(0.05, 0.15))
-                
-                # Submit
-                response_box.send_keys(Keys.ENTER)
+                response_box.send_keys(captcha_text + Keys.ENTER)
                 logger.info(f"✅ Submitted response: {captcha_text}")
                 time.sleep(5)  # Wait for verification
                 
@@ -536,20 +660,5 @@ def solve_recaptcha_audio(driver):
     finally:
         try:
             driver.switch_to.default_content()
-        except:
-            pass
-        # Cleanup
-        cleanup_audio_files()
-
-# Cleanup function to remove old audio files
-def cleanup_audio_files():
-    import glob
-    import os
-    
-    audio_files = glob.glob("captcha_audio_*")
-    for file in audio_files:
-        try:
-            os.remove(file)
-            logger.debug(f"Cleaned up: {file}")
         except:
             pass
\ No newline at end of file
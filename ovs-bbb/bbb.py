@@ -4,22 +4,26 @@ BBB SKU Extractor from OVS Variants
 Extracts modelNumber from BBB API for each variant ID
 """
 
-import pandas as pd
-import requests
 import json
 import logging
 import sys
 import os
 import argparse
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Tuple
 import time
 import re
 import csv
 import gc
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import aiohttp
 import urllib3
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Suppress SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -35,24 +39,97 @@ def setup_logging(chunk_id: int):
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler(log_file),
+            logging.FileHandler(log_file, delay=True),
             logging.StreamHandler(sys.stderr)
         ]
     )
     return logging.getLogger(__name__)
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
-    retry=retry_if_exception_type((requests.exceptions.Timeout, 
-                                  requests.exceptions.ConnectionError,
-                                  requests.exceptions.ChunkedEncodingError))
-)
+# orjson parses API payloads several times faster than the stdlib when it's
+# installed; the summary file keeps using json since it is written once
+json_loads = orjson.loads if orjson else json.loads
+
+def json_dumps(obj) -> str:
+    return orjson.dumps(obj).decode() if orjson else json.dumps(obj)
+
+# One INFO progress line per this many completed variants
+PROGRESS_EVERY = 1000
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Valid variant ID: digits, optionally with a float-style ".0" suffix and
+# surrounding whitespace, both of which are dropped
+VARIANT_ID_RE = re.compile(r'^\s*(\d+)(?:\.0)?\s*$')
+
+# BBB fields written after the input columns, in output order
+BBB_COLUMNS = [
+    'BBB_SKU',
+    'BBB_ModelNumber',
+    'BBB_OptionId',
+    'BBB_Description',
+    'BBB_Dimensions',
+    'BBB_Attributes',
+    # 'BBB_Attributes_Count',
+    # 'BBB_AttributeIcons_Count',
+    # 'BBB_AttributeIcons_URLs',
+    # 'BBB_AttributeIcons_Names',
+    # 'BBB_Error',
+]
+
+# Result for a variant with no usable API data; copied, never mutated
+EMPTY_BBB_RESULT = dict.fromkeys(BBB_COLUMNS, '')
+
+# Loop time until which every task holds off sending; set from Retry-After
+# on a 429 so one throttled response pauses the whole run, not just one task
+_pause_until = 0.0
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
 
-def fetch_json(api_url: str) -> Optional[dict]:
-    response = requests.get(api_url, timeout=10)
-    response.raise_for_status()
-    return response.json()
+async def fetch_json(session: aiohttp.ClientSession, api_url: str, attempts: int = 3,
+                     min_delay: float = 0.0) -> Optional[dict]:
+    """GET api_url and decode the JSON body, retrying timeouts, connection errors,
+    429 and 5xx with exponential backoff (2s, 4s, ... capped at 10s). A 429 waits
+    for Retry-After instead when the API sends one; no wait is shorter than min_delay"""
+    global _pause_until
+    loop = asyncio.get_running_loop()
+    for attempt in range(1, attempts + 1):
+        pause = _pause_until - loop.time()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        
+        throttled = False
+        retry_after = None
+        try:
+            async with session.get(api_url) as response:
+                if response.status not in RETRY_STATUSES or attempt == attempts:
+                    response.raise_for_status()
+                    return json_loads(await response.read())
+                logger.debug(f"HTTP {response.status} for {api_url}, retrying")
+                throttled = response.status == 429
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError):
+            if attempt == attempts:
+                raise
+        
+        delay = max(retry_after if retry_after is not None else min(2 ** attempt, 10), min_delay)
+        if throttled:
+            # Waited out at the top of the next attempt, along with every other task
+            _pause_until = max(_pause_until, loop.time() + delay)
+        else:
+            await asyncio.sleep(delay)
 
 # ================= DATA PROCESSING =================
 
@@ -95,44 +172,22 @@ def extract_bbb_data(variant_data: dict) -> Dict[str, Any]:
                 else:
                     result['BBB_Dimensions'] = f"{length}{length_units} x {width}{width_units}"
         
-        # Extract attributes as string
-        attributes = variant_data.get('attributes', [])
+        # Extract attributes as string; empty joins fall back to None
+        attributes = variant_data.get('attributes') or []
         if attributes:
-            attr_list = []
-            for attr in attributes:
-                name = attr.get('name', '').strip()
-                value = attr.get('value', '').strip()
-                if name and value:
-                    attr_list.append(f"{name}: {value}")
-            
-            if attr_list:
-                result['BBB_Attributes'] = " | ".join(attr_list)
+            pairs = ((attr.get('name', '').strip(), attr.get('value', '').strip()) for attr in attributes)
+            result['BBB_Attributes'] = " | ".join(f"{name}: {value}" for name, value in pairs if name and value) or None
             result['BBB_Attributes_Count'] = len(attributes)
         
-        # Extract attribute icons
-        icons = variant_data.get('attributeIcons', [])
+        # Extract attribute icons with their URLs and names
+        icons = variant_data.get('attributeIcons') or []
         result['BBB_AttributeIcons_Count'] = len(icons)
-        
-        # Extract icon URLs and names
         if icons:
-            icon_urls = []
-            icon_names = []
-            for icon in icons:
-                url = icon.get('url', '')
-                attribute_name = icon.get('attributeName', '')
-                attribute_value = icon.get('attributeValue', '')
-                
-                if url:
-                    icon_urls.append(url)
-                
-                if attribute_name:
-                    icon_names.append(f"{attribute_name}: {attribute_value}")
-            
-            if icon_urls:
-                result['BBB_AttributeIcons_URLs'] = " | ".join(icon_urls)
-            
-            if icon_names:
-                result['BBB_AttributeIcons_Names'] = " | ".join(icon_names)
+            result['BBB_AttributeIcons_URLs'] = " | ".join(icon['url'] for icon in icons if icon.get('url')) or None
+            result['BBB_AttributeIcons_Names'] = " | ".join(
+                f"{icon['attributeName']}: {icon.get('attributeValue', '')}"
+                for icon in icons if icon.get('attributeName')
+            ) or None
         
         return result
         
@@ -140,23 +195,18 @@ def extract_bbb_data(variant_data: dict) -> Dict[str, Any]:
         logger.error(f"Error extracting BBB data: {e}")
         return {}
 
-def process_variant_data(variant_id: str, stats: dict, request_delay: float = 1.0) -> Dict[str, Any]:
-    """Process a single BBB variant ID"""
+async def process_variant_data(session: aiohttp.ClientSession, variant_id: str, stats: dict,
+                               archive=None, response_cache: Optional[dict] = None,
+                               request_delay: float = 0.0, cache_file=None) -> Dict[str, Any]:
+    """Process a single BBB variant ID, appending the raw response to archive if given.
+    Responses already in response_cache are reused instead of refetched; new ones are
+    added to it and appended to cache_file."""
     try:
-        if not variant_id or pd.isna(variant_id):
+        if not variant_id:
             stats['skipped'] += 1
             return None
         
-        # Clean variant ID
-        variant_id = str(variant_id).strip()
-        variant_id = re.sub(r'\.0$', '', variant_id)
-        
-        # Validate variant ID is numeric
-        if not re.match(r'^\d+$', variant_id):
-            logger.warning(f"Invalid variant ID format: {variant_id}")
-            stats['invalid'] += 1
-            return None
-        
+        # IDs arrive already cleaned and validated by main()
         logger.debug(f"Processing variant ID: {variant_id}")
         
         # Try different API endpoints in order
@@ -167,33 +217,33 @@ def process_variant_data(variant_id: str, stats: dict, request_delay: float = 1.
         ]
         
         data = None
-        for api_url in api_endpoints:
-            logger.debug(f"Trying API endpoint: {api_url}")
-            data = fetch_json(api_url)
-            if data:
-                break
-            # time.sleep(0.5)  # Small delay between endpoint attempts
+        if response_cache is not None:
+            entry = response_cache.get(variant_id)
+            data = entry['response'] if entry else None
+        
+        if not data:
+            for api_url in api_endpoints:
+                logger.debug(f"Trying API endpoint: {api_url}")
+                data = await fetch_json(session, api_url, min_delay=request_delay)
+                if data:
+                    break
+                # time.sleep(0.5)  # Small delay between endpoint attempts
+            
+            if data and response_cache is not None:
+                entry = {'variant_id': variant_id, 'fetched_at': time.time(), 'response': data}
+                response_cache[variant_id] = entry
+                if cache_file is not None:
+                    cache_file.write(json_dumps(entry) + '\n')
         
         if not data:
             logger.warning(f"No data found for variant {variant_id}")
             stats['errors'] += 1
             
             # Return minimal result with error
-            return {
-                'Ref Varient ID': variant_id,
-                'BBB_SKU': '',
-                'BBB_ModelNumber': '',
-                'BBB_OptionId': '',
-                'BBB_Description': '',
-                'BBB_Dimensions': '',
-                'BBB_Attributes': '',
-                # 'BBB_Attributes_Count': '',
-                # 'BBB_AttributeIcons_Count': '',
-                # 'BBB_AttributeIcons_URLs': '',
-                # 'BBB_AttributeIcons_Names': '',
-                # 'BBB_Error': 'No data found or timeout',
-                # 'BBB_API_Response': ''
-            }
+            return {**EMPTY_BBB_RESULT, 'Ref Varient ID': variant_id}
+        
+        if archive is not None:
+            archive.write(json_dumps({'variant_id': variant_id, 'response': data}) + '\n')
         
         # Extract data from response
         variant_info = extract_bbb_data(data)
@@ -212,35 +262,102 @@ def process_variant_data(variant_id: str, stats: dict, request_delay: float = 1.
             # 'BBB_AttributeIcons_URLs': variant_info.get('BBB_AttributeIcons_URLs', ''),
             # 'BBB_AttributeIcons_Names': variant_info.get('BBB_AttributeIcons_Names', ''),
             # 'BBB_Error': '',
-            # 'BBB_API_Response': json.dumps(data) if variant_info else ''
         }
         
         stats['processed'] += 1
-        logger.info(f"Processed variant {variant_id}: SKU={variant_info.get('BBB_SKU', 'N/A')}")
-        
-        # Respect request delay (increased for rate limiting)
-        # time.sleep(request_delay)
+        logger.debug(f"Processed variant {variant_id}: SKU={variant_info.get('BBB_SKU', 'N/A')}")
         
         return result
         
     except Exception as e:
         logger.error(f"Error processing variant {variant_id if 'variant_id' in locals() else 'UNKNOWN'}: {e}")
         stats['errors'] += 1
-        return {
-            'Ref Varient ID': variant_id if 'variant_id' in locals() else '',
-            'BBB_SKU': '',
-            'BBB_ModelNumber': '',
-            'BBB_OptionId': '',
-            'BBB_Description': '',
-            'BBB_Dimensions': '',
-            'BBB_Attributes': ''
-            # 'BBB_Attributes_Count': '',
-            # 'BBB_AttributeIcons_Count': '',
-            # 'BBB_AttributeIcons_URLs': '',
-            # 'BBB_AttributeIcons_Names': '',
-            # 'BBB_Error': str(e),
-            # 'BBB_API_Response': ''
-        }
+        return {**EMPTY_BBB_RESULT, 'Ref Varient ID': variant_id if 'variant_id' in locals() else ''}
+
+async def process_variants(variant_ids: List[str], stats: dict, max_workers: int, timeout: int,
+                           on_result, archive=None, response_cache: Optional[dict] = None,
+                           request_delay: float = 0.0, cache_file=None) -> None:
+    """Fetch all variant IDs over one keep-alive session with at most max_workers requests
+    in flight, calling on_result(variant_id, result) as each one completes"""
+    connector = aiohttp.TCPConnector(limit=max_workers, limit_per_host=max_workers)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    # Bounded so only a few IDs are queued ahead of the workers; None tells a worker to stop
+    work_queue = asyncio.Queue(maxsize=2 * max_workers)
+    completed = 0
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        async def worker():
+            nonlocal completed
+            while True:
+                variant_id = await work_queue.get()
+                if variant_id is None:
+                    return
+                result = await process_variant_data(session, variant_id, stats, archive, response_cache,
+                                                    request_delay, cache_file)
+                on_result(variant_id, result)
+                
+                completed += 1
+                if completed % PROGRESS_EVERY == 0 or completed == len(variant_ids):
+                    logger.info(f"Progress: {completed}/{len(variant_ids)} variants "
+                                f"({stats['processed']} processed, {stats['errors']} errors)")
+        
+        async def producer():
+            for variant_id in variant_ids:
+                await work_queue.put(variant_id)
+            for _ in range(max_workers):
+                await work_queue.put(None)
+        
+        await asyncio.gather(producer(), *(worker() for _ in range(max_workers)))
+
+def load_response_cache(cache_path: str, max_age: float) -> Dict[str, dict]:
+    """Cache entries from the JSONL file at cache_path by variant ID, dropping those
+    fetched more than max_age seconds ago (none when max_age is 0). The file is
+    rewritten with just the kept entries so repeated runs don't grow it forever"""
+    cache = {}
+    if not os.path.exists(cache_path):
+        return cache
+    cutoff = time.time() - max_age if max_age > 0 else None
+    with open(cache_path, 'rb') as f_cache:
+        for line in f_cache:
+            try:
+                entry = json_loads(line)
+            except ValueError:
+                continue  # last line of a run that was killed mid-write
+            if not isinstance(entry, dict) or 'variant_id' not in entry:
+                continue
+            if cutoff is not None and entry.get('fetched_at', 0) < cutoff:
+                continue
+            cache[entry['variant_id']] = entry
+    
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', buffering=1 << 20) as f_tmp:
+        for entry in cache.values():
+            f_tmp.write(json_dumps(entry) + '\n')
+    os.replace(tmp_path, cache_path)
+    return cache
+
+def read_valid_rows(input_file: str, encoding: str, variant_id_column: str,
+                    keep: Optional[range] = None) -> Tuple[List[dict], Dict[str, Any]]:
+    """Read input rows with a valid variant ID, cleaned and stored under 'Ref Varient ID'.
+    Only rows whose position among the valid rows is in keep are returned (all of them
+    when keep is None), along with row, valid and invalid counts for the whole file"""
+    rows = []
+    counts = {'rows': 0, 'valid': 0, 'invalid': 0, 'invalid_samples': []}
+    with open(input_file, newline='', encoding=encoding) as f_in:
+        for row in csv.DictReader(f_in, restval=''):
+            counts['rows'] += 1
+            raw_id = row.pop(variant_id_column) or ''
+            match = VARIANT_ID_RE.match(raw_id)
+            if not match:
+                counts['invalid'] += 1
+                if len(counts['invalid_samples']) < 10:
+                    counts['invalid_samples'].append(raw_id)
+                continue
+            if keep is None or counts['valid'] in keep:
+                row['Ref Varient ID'] = match.group(1)
+                rows.append(row)
+            counts['valid'] += 1
+    return rows, counts
 
 # ================= MAIN FUNCTION =================
 
@@ -254,8 +371,15 @@ def main():
                        help='BBB API base URL (default: https://api.bedbathandbeyond.com/options)')
     parser.add_argument('--output-dir', type=str, default='output', help='Output directory')
     parser.add_argument('--max-workers', type=int, default=2, help='Maximum concurrent requests (reduced for rate limiting)')
-    parser.add_argument('--request-delay', type=float, default=1.0, help='Delay between requests in seconds (increased for rate limiting)')
+    parser.add_argument('--request-delay', type=float, default=1.0, help='Minimum wait in seconds before retrying a throttled or failed request')
     parser.add_argument('--timeout', type=int, default=15, help='Request timeout in seconds')
+    parser.add_argument('--cache-path', type=str, default=None,
+                       help='Cross-run cache: JSONL file of API responses by variant ID. Later runs '
+                            'reuse them instead of refetching; new responses are appended as they arrive')
+    parser.add_argument('--cache-max-age', type=float, default=24.0,
+                       help='Hours a cached response stays valid before it is refetched (0 = never expires)')
+    parser.add_argument('--archive-raw', action='store_true',
+                       help='Also write raw API responses to raw_responses_chunk_<id>.jsonl in the output directory')
     
     args = parser.parse_args()
     
@@ -272,125 +396,98 @@ def main():
     logger.info(f"Input file: {args.input_file}")
     logger.info(f"API URL: {args.api_url}")
     logger.info(f"Max workers: {args.max_workers} (reduced to avoid rate limiting)")
-    logger.info(f"Request delay: {args.request_delay}s (increased to avoid rate limiting)")
+    logger.info(f"Minimum retry delay: {args.request_delay}s")
     logger.info(f"Timeout: {args.timeout}s")
     logger.info(f"Output directory: {args.output_dir}")
     logger.info("=" * 60)
     
-    # Read input CSV
+    # Read input CSV row by row; only valid rows are kept, as plain dicts. With
+    # several chunks the first pass only counts valid rows, and a second pass
+    # keeps just this chunk's slice of them
     logger.info(f"Loading input CSV: {args.input_file}")
+    possible_columns = ['Ref Varient ID', 'Ref Variant ID', 'variant_id', 'Variant ID', 'variantId', 
+                        'variation_id', 'Variation ID', 'ID']
+    variant_id_column = None
+    input_columns = []
+    keep = range(0) if args.total_chunks > 1 else None
     try:
         # Try different encodings
-        encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-        df = None
+        encodings = ['utf-8-sig', 'latin-1', 'iso-8859-1', 'cp1252']
         for encoding in encodings:
             try:
-                df = pd.read_csv(args.input_file, dtype={'Ref Varient ID': str}, encoding=encoding)
+                with open(args.input_file, newline='', encoding=encoding) as f_in:
+                    input_columns = next(csv.reader(f_in), [])
+                variant_id_column = next((col for col in possible_columns if col in input_columns), None)
+                if not variant_id_column:
+                    break
+                valid_rows, counts = read_valid_rows(args.input_file, encoding, variant_id_column, keep)
                 logger.info(f"Successfully read with {encoding} encoding")
                 break
             except UnicodeDecodeError:
                 continue
-        
-        if df is None:
-            # Last resort: try without specifying encoding
-            df = pd.read_csv(args.input_file, dtype={'Ref Varient ID': str})
+        else:
+            raise ValueError(f"could not decode with any of {encodings}")
             
     except Exception as e:
         logger.error(f"Error reading CSV file: {e}")
         sys.exit(1)
     
-    # Check if required column exists
-    variant_id_column = None
-    possible_columns = ['Ref Varient ID', 'Ref Variant ID', 'variant_id', 'Variant ID', 'variantId', 
-                        'variation_id', 'Variation ID', 'ID']
-    
-    for col in possible_columns:
-        if col in df.columns:
-            variant_id_column = col
-            logger.info(f"Found variant ID column: {col}")
-            break
-    
     if not variant_id_column:
-        logger.error(f"Missing variant ID column. Available columns: {list(df.columns)}")
+        logger.error(f"Missing variant ID column. Available columns: {input_columns}")
         sys.exit(1)
     
-    # Rename to standard column name for processing
+    logger.info(f"Found variant ID column: {variant_id_column}")
     if variant_id_column != 'Ref Varient ID':
-        df = df.rename(columns={variant_id_column: 'Ref Varient ID'})
         logger.info(f"Renamed column '{variant_id_column}' to 'Ref Varient ID'")
     
-    # Clean variant IDs
-    logger.info(f"Original data shape: {df.shape}")
-    df['Ref Varient ID'] = df['Ref Varient ID'].astype(str).str.strip()
-    df['Ref Varient ID'] = df['Ref Varient ID'].str.replace(r'\.0$', '', regex=True)
-    
-    # Remove any rows with empty variant IDs
-    df = df[df['Ref Varient ID'].notna() & (df['Ref Varient ID'] != '')]
-    
-    # Filter valid numeric variant IDs
-    valid_mask = df['Ref Varient ID'].str.match(r'^\d+$')
-    df_valid = df[valid_mask].copy()
-    
-    invalid_count = len(df) - len(df_valid)
-    if invalid_count > 0:
-        logger.warning(f"Found {invalid_count} invalid variant IDs (non-numeric or empty)")
+    logger.info(f"Original data shape: ({counts['rows']}, {len(input_columns)})")
+    if counts['invalid'] > 0:
+        logger.warning(f"Found {counts['invalid']} invalid variant IDs (non-numeric or empty)")
         # Show sample of invalid IDs
-        invalid_samples = df[~valid_mask]['Ref Varient ID'].head(10).tolist()
-        logger.warning(f"Sample invalid IDs: {invalid_samples}")
+        logger.warning(f"Sample invalid IDs: {counts['invalid_samples']}")
+    
+    valid_count = counts['valid']
+    logger.info(f"Valid rows after cleaning: {valid_count}")
     
-    logger.info(f"Valid rows after cleaning: {len(df_valid)}")
-    logger.info(f"Unique variant IDs: {df_valid['Ref Varient ID'].nunique()}")
+    # Output layout: variant ID, the other input columns, then the BBB fields
+    other_columns = [col for col in input_columns if col != variant_id_column]
+    output_columns = ['Ref Varient ID'] + other_columns + BBB_COLUMNS
     
-    if len(df_valid) == 0:
+    if valid_count == 0:
         logger.warning("No valid variant IDs to process")
-        # Create empty output file with headers
+        # Create empty output file with the same header as every other chunk
         output_file = os.path.join(args.output_dir, f"bbb_output_chunk_{args.chunk_id}.csv")
         with open(output_file, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
-            writer.writerow([
-                'Ref Varient ID',
-                'BBB_SKU',
-                'BBB_ModelNumber',
-                'BBB_OptionId',
-                'BBB_Description',
-                'BBB_Dimensions',
-                'BBB_Attributes',
-                'BBB_Attributes_Count',
-                'BBB_AttributeIcons_Count',
-                'BBB_AttributeIcons_URLs',
-                'BBB_AttributeIcons_Names',
-                'BBB_Error'
-            ])
+            writer.writerow(output_columns)
         logger.info(f"Empty output created: {output_file}")
         sys.exit(0)
     
     # Split into chunks
     if args.total_chunks > 1:
-        chunk_size = len(df_valid) // args.total_chunks
+        chunk_size = valid_count // args.total_chunks
         if chunk_size == 0:
             chunk_size = 1
         
         start_idx = (args.chunk_id - 1) * chunk_size
-        end_idx = start_idx + chunk_size if args.chunk_id < args.total_chunks else len(df_valid)
+        end_idx = start_idx + chunk_size if args.chunk_id < args.total_chunks else valid_count
         
-        start_idx = min(start_idx, len(df_valid))
-        end_idx = min(end_idx, len(df_valid))
+        start_idx = min(start_idx, valid_count)
+        end_idx = min(end_idx, valid_count)
         
-        chunk_df = df_valid.iloc[start_idx:end_idx].copy()
-        logger.info(f"Processing chunk {args.chunk_id}/{args.total_chunks}: rows {start_idx}-{end_idx} ({len(chunk_df)} rows)")
+        chunk_rows, _ = read_valid_rows(args.input_file, encoding, variant_id_column, range(start_idx, end_idx))
+        logger.info(f"Processing chunk {args.chunk_id}/{args.total_chunks}: rows {start_idx}-{end_idx} ({len(chunk_rows)} rows)")
     else:
-        chunk_df = df_valid.copy()
-        logger.info(f"Processing all {len(chunk_df)} rows")
+        chunk_rows = valid_rows
+        logger.info(f"Processing all {len(chunk_rows)} rows")
+    del valid_rows
     
-    # Get unique variant IDs
-    variant_ids = chunk_df['Ref Varient ID'].unique().tolist()
+    # Get unique variant IDs, in input order
+    variant_ids = list(dict.fromkeys(row['Ref Varient ID'] for row in chunk_rows))
     logger.info(f"Total variant IDs to process: {len(variant_ids)}")
     if len(variant_ids) > 0:
         logger.info(f"Sample variant IDs: {variant_ids[:10]}")
     
-    # Create session
-    # session = create_session()
-    
     # Initialize statistics
     stats = {
         'processed': 0,
@@ -399,104 +496,74 @@ def main():
         'invalid': 0
     }
     
-    # Process variant IDs with rate limiting
-    results = []
-    processed_ids = set()
+    # Responses from earlier runs, so re-running a chunk only hits the API for new
+    # or expired IDs
+    response_cache = None
+    if args.cache_path:
+        response_cache = load_response_cache(args.cache_path, args.cache_max_age * 3600)
+        logger.info(f"Loaded {len(response_cache)} cached responses from {args.cache_path}")
     
-    # Use a simpler approach with smaller batches
-    batch_size = min(50, args.max_workers * 10)
-    for i in range(0, len(variant_ids), batch_size):
-        batch = variant_ids[i:i + batch_size]
-        logger.info(f"Processing batch {i//batch_size + 1}/{(len(variant_ids) + batch_size - 1)//batch_size} ({len(batch)} IDs)")
-        
-        with ThreadPoolExecutor(max_workers=min(args.max_workers, len(batch))) as executor:
-            futures = []
-            for variant_id in batch:
-                if variant_id in processed_ids:
-                    continue
-                    
-                future = executor.submit(
-                    process_variant_data, 
-                    variant_id,
-                    stats, 
-                    args.request_delay
-                )
-                futures.append(future)
-                processed_ids.add(variant_id)
-            
-            # Collect results
-            for future in as_completed(futures):
-                try:
-                    result = future.result()
-                    if result:
-                        results.append(result)
-                except Exception as e:
-                    logger.error(f"Error in thread execution: {e}")
-                    stats['errors'] += 1
-        
-        # Small delay between batches
-        if i + batch_size < len(variant_ids):
-            logger.info(f"Batch completed")
-            # time.sleep(5)
-    
-    # Close session
-    # session.close()
-    
-    # Create results DataFrame
-    if results:
-        results_df = pd.DataFrame(results)
-        
-        # Merge with original data if we have additional columns
-        if len(chunk_df.columns) > 1:  # More than just Ref Varient ID
-            results_df = chunk_df.merge(results_df, on='Ref Varient ID', how='left')
-    else:
-        # Create empty results with original data
-        results_df = chunk_df.copy()
-        # Add BBB columns with empty values
-        bbb_columns = [
-            'BBB_SKU', 'BBB_ModelNumber', 'BBB_OptionId', 'BBB_Description',
-            'BBB_Dimensions', 'BBB_Attributes',
-        ]
-        for col in bbb_columns:
-            results_df[col] = ''
-    
-    # Ensure all required columns are present
-    required_columns = [
-        'Ref Varient ID',
-        'BBB_SKU',
-        'BBB_ModelNumber',
-        'BBB_OptionId',
-        'BBB_Description',
-        'BBB_Dimensions',
-        'BBB_Attributes',
-        # 'BBB_Attributes_Count',
-        # 'BBB_AttributeIcons_Count',
-        # 'BBB_AttributeIcons_URLs',
-        # 'BBB_AttributeIcons_Names',
-        # 'BBB_Error',
-        # 'BBB_API_Response'
-    ]
-    
-    # Add any missing columns
-    for col in required_columns:
-        if col not in results_df.columns:
-            results_df[col] = ''
+    # With no other columns one row per variant ID is enough
+    if not other_columns:
+        chunk_rows = [{'Ref Varient ID': variant_id} for variant_id in variant_ids]
     
-    # Reorder columns
-    other_columns = [col for col in results_df.columns if col not in required_columns]
-    final_columns = ['Ref Varient ID'] + other_columns + [col for col in required_columns if col != 'Ref Varient ID']
-    results_df = results_df[final_columns]
-    
-    # Save output
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_file = os.path.join(args.output_dir, f"bbb_output_chunk_{args.chunk_id}_{timestamp}.csv")
-    
-    # Convert any non-string columns to string for CSV output
-    for col in results_df.columns:
-        if results_df[col].dtype == 'object':
-            results_df[col] = results_df[col].astype(str)
-    
-    results_df.to_csv(output_file, index=False, encoding='utf-8')
+    skus = []
+    rows_written = 0
+    results = {}
+    
+    # Rows keep their input order: each is written once every row before it
+    # has its result, so only rows queued behind a slower variant are held
+    # back. Callbacks run on the event loop thread, one at a time, and the
+    # 1 MiB buffer keeps nearly all of them from reaching a syscall. BBB fields
+    # that extract_bbb_data leaves as None are written as empty cells, the same
+    # as missing input cells, not as the string 'None'
+    with open(output_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f_out:
+        writer = csv.DictWriter(f_out, fieldnames=output_columns, extrasaction='ignore')
+        writer.writeheader()
+        
+        def flush_rows(until_done=False):
+            nonlocal rows_written
+            while rows_written < len(chunk_rows):
+                row = chunk_rows[rows_written]
+                variant_id = row['Ref Varient ID']
+                if variant_id not in results and not until_done:
+                    return
+                writer.writerow({**row, **results.get(variant_id, EMPTY_BBB_RESULT)})
+                rows_written += 1
+        
+        def write_result(variant_id, result):
+            bbb_fields = result or EMPTY_BBB_RESULT
+            if bbb_fields.get('BBB_SKU'):
+                skus.append(bbb_fields['BBB_SKU'])
+            results[variant_id] = bbb_fields
+            flush_rows()
+        
+        # New responses are appended to the cache line by line as they arrive,
+        # so a crashed or cancelled run keeps everything it already fetched
+        cache_file = None
+        if response_cache is not None:
+            cache_file = open(args.cache_path, 'a', encoding='utf-8', buffering=1)
+        try:
+            # Process variant IDs concurrently, bounded by --max-workers. Raw
+            # responses go to a JSONL sidecar only when asked for
+            if args.archive_raw:
+                archive_file = os.path.join(args.output_dir, f"raw_responses_chunk_{args.chunk_id}.jsonl")
+                with open(archive_file, 'w', encoding='utf-8', buffering=1 << 20) as archive:
+                    asyncio.run(process_variants(variant_ids, stats, args.max_workers, args.timeout,
+                                                 write_result, archive, response_cache, args.request_delay,
+                                                 cache_file))
+                logger.info(f"Raw API responses saved to: {archive_file}")
+            else:
+                asyncio.run(process_variants(variant_ids, stats, args.max_workers, args.timeout,
+                                             write_result, response_cache=response_cache,
+                                             request_delay=args.request_delay, cache_file=cache_file))
+        finally:
+            if cache_file is not None:
+                cache_file.close()
+                logger.info(f"Cache holds {len(response_cache)} responses: {args.cache_path}")
+        flush_rows(until_done=True)
     
     # Print statistics
     logger.info("=" * 60)
@@ -512,15 +579,13 @@ def main():
         logger.info(f"Success rate: {success_rate:.1f}%")
     
     # Show sample of successful SKUs
-    if stats['processed'] > 0:
-        skus = results_df['BBB_SKU'].dropna().unique().tolist()
-        if skus:
-            logger.info(f"Sample SKUs found: {skus[:10]}")
+    if skus:
+        logger.info(f"Sample SKUs found: {list(dict.fromkeys(skus))[:10]}")
     
     logger.info("=" * 60)
     logger.info(f"Output saved to: {output_file}")
-    logger.info(f"Output shape: {results_df.shape}")
-    logger.info(f"Output columns: {len(results_df.columns)}")
+    logger.info(f"Output rows: {rows_written}")
+    logger.info(f"Output columns: {len(output_columns)}")
     logger.info("=" * 60)
     
     # Create summary JSON
@@ -551,13 +616,4 @@ def main():
     gc.collect()
 
 if __name__ == "__main__":
-    # Install tenacity if not available
-    try:
-        import tenacity
-    except ImportError:
-        import subprocess
-        import sys
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "tenacity"])
-        import tenacity
-    
     main()
\ No newline at end of file
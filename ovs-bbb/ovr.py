@@ -5,6 +5,8 @@ import sys
 import gc
 import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
 import json
 from typing import Optional, List, Dict, Any
@@ -12,6 +14,12 @@ from datetime import datetime, timezone
 from xml.etree import ElementTree as ET
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 # ================= ENV =================
 
 CURR_URL = os.getenv("CURR_URL", "").rstrip("/")
@@ -36,6 +44,19 @@ def log(msg: str, level: str = "INFO"):
 # ================= HTTP SESSION =================
 
 session = requests.Session()
+# Pools for the site and its API host, each sized so every worker can keep a
+# socket alive instead of reconnecting once the default 10 are in use. Failed
+# connections, 429 and 5xx are retried here with backoff, honoring Retry-After
+retries = Retry(
+    total=3,
+    backoff_factor=1.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(MAX_WORKERS, 10), max_retries=retries)
+session.mount("http://", adapter)
+session.mount("https://", adapter)
 # Add default headers to session for all requests
 session.headers.update({
     # "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -51,39 +72,33 @@ session.headers.update({
 })
 
 def http_get(url: str, is_json: bool = False) -> Optional[str]:
-    """HTTP GET request with different headers for sitemap vs API requests"""
-    for attempt in range(3):
-        try:
-            if is_json:
-                # For API/JSON requests, override with JSON-specific headers
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                    "Accept": "application/json, text/javascript, */*; q=0.01",
-                    "Accept-Language": "en-US,en;q=0.9",
-                    "Referer": f"{CURR_URL}/",
-                    "X-Requested-With": "XMLHttpRequest",
-                    "Sec-Fetch-Dest": "empty",
-                    "Sec-Fetch-Mode": "cors",
-                    "Sec-Fetch-Site": "same-origin",
-                }
-                r = session.get(url, headers=headers, timeout=15, verify=True)
-            else:
-                # For sitemap/XML requests, use default session headers (already set)
-                r = session.get(url, timeout=15, verify=True)
-                
-            if r.status_code == 200:
-                log(f"Success fetching {url}", "DEBUG")
-                return r.text
-            else:
-                log(f"Status {r.status_code} for {url}", "WARNING")
-                if r.status_code == 429:  # Rate limited
-                    time.sleep(5)
-        except requests.exceptions.Timeout:
-            log(f"Timeout on attempt {attempt+1} for {url}", "WARNING")
-            time.sleep(2)
-        except Exception as e:
-            log(f"Attempt {attempt+1} failed for {url}: {type(e).__name__}", "WARNING")
-            time.sleep(1)
+    """HTTP GET request with different headers for sitemap vs API requests.
+    Retries and backoff are handled by the session's adapter"""
+    try:
+        if is_json:
+            # For API/JSON requests, override with JSON-specific headers
+            headers = {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+                "Accept": "application/json, text/javascript, */*; q=0.01",
+                "Accept-Language": "en-US,en;q=0.9",
+                "Referer": f"{CURR_URL}/",
+                "X-Requested-With": "XMLHttpRequest",
+                "Sec-Fetch-Dest": "empty",
+                "Sec-Fetch-Mode": "cors",
+                "Sec-Fetch-Site": "same-origin",
+            }
+            r = session.get(url, headers=headers, timeout=15, verify=True)
+        else:
+            # For sitemap/XML requests, use default session headers (already set)
+            r = session.get(url, timeout=15, verify=True)
+    except requests.exceptions.RequestException as e:
+        log(f"Request failed for {url}: {type(e).__name__}", "WARNING")
+        return None
+        
+    if r.status_code == 200:
+        log(f"Success fetching {url}", "DEBUG")
+        return r.text
+    log(f"Status {r.status_code} for {url}", "WARNING")
     return None
 
 def fetch_json(url: str) -> Optional[dict]:
@@ -103,7 +118,7 @@ def fetch_json(url: str) -> Optional[dict]:
         
         r = session.get(url, headers=headers, timeout=15, verify=True)
         if r.status_code == 200:
-            return r.json()
+            return json_loads(r.content)
         else:
             log(f"JSON fetch failed: {r.status_code} for {url}", "WARNING")
             return None
@@ -116,6 +131,8 @@ def fetch_json(url: str) -> Optional[dict]:
 
 # ================= SITEMAP PROCESSING =================
 
+LOC_RE = re.compile(r'<loc>(https?://[^<]+)</loc>')
+
 def load_xml(url: str) -> Optional[ET.Element]:
     """Load XML with appropriate headers"""
     # For GitHub Actions, we might need longer timeout for sitemap
@@ -145,7 +162,7 @@ def load_xml(url: str) -> Optional[ET.Element]:
         try:
             # Create a dummy element
             root = ET.Element("urlset")
-            urls = re.findall(r'<loc>(https?://[^<]+)</loc>', data)
+            urls = LOC_RE.findall(data)
             for url_text in urls:
                 url_elem = ET.SubElement(root, "url")
                 loc_elem = ET.SubElement(url_elem, "loc")
@@ -155,19 +172,20 @@ def load_xml(url: str) -> Optional[ET.Element]:
             log(f"Regex extraction also failed: {e2}", "ERROR")
             return None
 
+# Product ID locations in Overstock URLs, tried in order
+PRODUCT_ID_PATTERNS = [
+    re.compile(r'/(\d+)/product\.html'),
+    re.compile(r'/product/(\d+)/'),
+    re.compile(r'/catalog/(\d+)/'),
+    re.compile(r'/[\w-]+/(\d+)\.html'),
+    re.compile(r'/(\d+)\.html'),
+    re.compile(r'[?&]IID=(\d+)'),
+]
+
 def extract_product_id(product_url: str) -> Optional[str]:
     """Extract product ID from Overstock URL"""
-    patterns = [
-        r'/(\d+)/product\.html',      
-        r'/product/(\d+)/',
-        r'/catalog/(\d+)/',
-        r'/[\w-]+/(\d+)\.html',
-        r'/(\d+)\.html',
-        r'[?&]IID=(\d+)',
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, product_url)
+    for pattern in PRODUCT_ID_PATTERNS:
+        match = pattern.search(product_url)
         if match:
             product_id = match.group(1)
             log(f"Extracted product ID {product_id} from {product_url}", "DEBUG")
@@ -179,6 +197,9 @@ def extract_product_id(product_url: str) -> Optional[str]:
 # ================= PRODUCT PROCESSING =================
 
 csv_lock = threading.Lock()
+seen_lock = threading.Lock()
+# stats counters are bumped from every worker; += on a dict entry is not atomic
+stats_lock = threading.Lock()
 
 def normalize_image_url(url: str) -> str:
     """Normalize image URL for Overstock"""
@@ -197,10 +218,14 @@ def normalize_image_url(url: str) -> str:
 from typing import Dict
 
 
+# Separate session for the BBB API so it doesn't inherit the browser headers above
+bbb_session = requests.Session()
+bbb_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max(MAX_WORKERS, 10)))
+
 def fetch_json_bbb(api_url: str) -> Optional[dict]:
-    response = requests.get(api_url, timeout=10)
+    response = bbb_session.get(api_url, timeout=10)
     response.raise_for_status()
-    return response.json()
+    return json_loads(response.content)
 
 def extract_bbb_data(variant_data: dict) -> Dict[str, Any]:
     """
@@ -591,18 +616,22 @@ def extract_overstock_data(product_data: dict, product_url: str) -> List[Dict]:
         return []
 
 
+JSON_LD_RE = re.compile(r'<script type="application/ld\+json">(.*?)</script>', re.DOTALL)
+
 def process_product_data(product_url: str, writer, seen: set, stats: dict):
     """Process a single Overstock product URL - handles multiple variations"""
-    if product_url in seen:
-        return
-    seen.add(product_url)
+    with seen_lock:
+        if product_url in seen:
+            return
+        seen.add(product_url)
     
     log(f"Processing product URL: {product_url}", "DEBUG")
     
     # Extract product ID
     product_id = extract_product_id(product_url)
     if not product_id:
-        stats['errors'] += 1
+        with stats_lock:
+            stats['errors'] += 1
         log(f"No product ID found for URL: {product_url}", "ERROR")
         return
     
@@ -624,8 +653,7 @@ def process_product_data(product_url: str, writer, seen: set, stats: dict):
         page_content = http_get(product_url, is_json=False)
         if page_content:
             # Look for JSON-LD or product data in page
-            json_ld_pattern = r'<script type="application/ld\+json">(.*?)</script>'
-            matches = re.findall(json_ld_pattern, page_content, re.DOTALL)
+            matches = JSON_LD_RE.findall(page_content)
             if matches:
                 try:
                     data = json.loads(matches[0])
@@ -633,7 +661,8 @@ def process_product_data(product_url: str, writer, seen: set, stats: dict):
                     pass
     
     if not data:
-        stats['errors'] += 1
+        with stats_lock:
+            stats['errors'] += 1
         log(f"No data found for product {product_id}", "ERROR")
         return
     
@@ -641,7 +670,8 @@ def process_product_data(product_url: str, writer, seen: set, stats: dict):
     products_list = extract_overstock_data(data, product_url)
     
     if not products_list:
-        stats['errors'] += 1
+        with stats_lock:
+            stats['errors'] += 1
         log(f"No variations found for product {product_id}", "ERROR")
         return
     
@@ -684,18 +714,21 @@ def process_product_data(product_url: str, writer, seen: set, stats: dict):
                 writer.writerow(row)
             
             
-            stats['products_fetched'] += 1
+            with stats_lock:
+                stats['products_fetched'] += 1
             
             log(f"Fetched product {product_info['product_id']}: {product_info['name'][:50]}...", "INFO")
             
         except Exception as e:
             log(f"Error creating row for product {product_id}: {e}", "ERROR")
-            stats['errors'] += 1
+            with stats_lock:
+                stats['errors'] += 1
         
     
     # Respect request delay
     time.sleep(REQUEST_DELAY)
-    stats['urls_processed'] += 1
+    with stats_lock:
+        stats['urls_processed'] += 1
 
 # ================= MAIN =================
 def get_sitemap_from_robots_txt():
@@ -876,7 +909,8 @@ def main():
                         future.result()
                     except Exception as e:
                         log(f"Error in thread execution: {e}", "ERROR")
-                        stats['errors'] += 1
+                        with stats_lock:
+                            stats['errors'] += 1
             
             # Clean up memory
             gc.collect()
@@ -1,9 +1,18 @@
 #!/usr/bin/env python3
 import os
 import sys
+import csv
 import pandas as pd
 from datetime import datetime
 
+# pyarrow's multithreaded CSV reader is several times faster than pandas'
+# default parser; fall back to the C engine where it isn't installed
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa_csv = None
+
 
 CHUNKS_DIR = os.getenv("CHUNKS_DIR", "chunks")
 OUTPUT_PREFIX_PRODUCTS = "merged_products"
@@ -30,6 +39,35 @@ def collect_csv_files(base_dir: str):
     return product_files, seller_files
 
 
+def read_chunk_csv(path, sort_cols):
+    """Read one chunk CSV keeping every column but the sort keys as text.
+
+    Both readers get the same column types and treat only empty cells as
+    missing, so values are written back exactly as scraped and the merged
+    file is the same whether or not pyarrow is installed. pandas' pyarrow
+    engine infers types (timestamps, floats) before applying dtype, so
+    pyarrow.csv is called directly.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        header = next(csv.reader(fh), [])
+    text_cols = [col for col in header if col not in sort_cols]
+
+    if pa_csv is None:
+        return pd.read_csv(path, dtype={col: str for col in text_cols},
+                           keep_default_na=False, na_values=[""])
+
+    table = pa_csv.read_csv(
+        path,
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={col: pa.string() for col in text_cols},
+            null_values=[""],
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas()
+
+
 def merge_csv(files, sort_cols, output_prefix):
     if not files:
         print(f"[INFO] No files found for {output_prefix}")
@@ -40,7 +78,7 @@ def merge_csv(files, sort_cols, output_prefix):
     dfs = []
     for f in files:
         try:
-            df = pd.read_csv(f)
+            df = read_chunk_csv(f, sort_cols)
             dfs.append(df)
             print(f"  ✓ {f} ({len(df)} rows)")
         except Exception as e:
@@ -51,6 +89,8 @@ def merge_csv(files, sort_cols, output_prefix):
         return None
 
     merged = pd.concat(dfs, ignore_index=True)
+    # The per-file frames are copied into merged; drop them before sorting
+    del dfs, df
 
     for col in sort_cols:
         if col not in merged.columns:
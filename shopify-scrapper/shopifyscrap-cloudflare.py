@@ -2,7 +2,6 @@ import os
 import csv
 import time
 import sys
-import gc
 import random
 import threading
 import cloudscraper
@@ -13,6 +12,12 @@ from xml.etree import ElementTree as ET
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 # ================= ENV =================
 
 CURR_URL = os.getenv("CURR_URL", "").rstrip("/")
@@ -94,19 +99,19 @@ class RequestManager:
             log(f"Taking longer pause after {self.request_count} requests: {long_pause:.1f}s")
             time.sleep(long_pelay)
     
-    def _fetch_with_cloudscraper(self, url: str, crawl_delay=None) -> Optional[Tuple[str, int]]:
+    def _fetch_with_cloudscraper(self, url: str, crawl_delay=None) -> Optional[Tuple[bytes, int]]:
         """Use cloudscraper for Cloudflare-protected pages"""
         try:
             self._respect_rate_limit(crawl_delay)
             response = self.scraper.get(url, timeout=45)
             if response.status_code == 200:
-                return response.text, response.status_code
+                return response.content, response.status_code
             return None, response.status_code
         except Exception as e:
             log(f"Cloudscraper error for {url}: {e}")
             return None, 0
     
-    def _fetch_with_curl_cffi(self, url: str, crawl_delay=None) -> Optional[Tuple[str, int]]:
+    def _fetch_with_curl_cffi(self, url: str, crawl_delay=None) -> Optional[Tuple[bytes, int]]:
         """Use curl_cffi for JavaScript-heavy pages"""
         try:
             self._respect_rate_limit(crawl_delay)
@@ -118,14 +123,15 @@ class RequestManager:
                 impersonate="chrome110"  # Mimic Chrome 110
             )
             if response.status_code == 200:
-                return response.text, response.status_code
+                return response.content, response.status_code
             return None, response.status_code
         except Exception as e:
             log(f"Curl_cffi error for {url}: {e}")
             return None, 0
     
-    def fetch(self, url: str, retry_count: int = 0, crawl_delay=None) -> Optional[str]:
-        """Intelligent fetching with fallback strategies"""
+    def fetch(self, url: str, retry_count: int = 0, crawl_delay=None) -> Optional[bytes]:
+        """Intelligent fetching with fallback strategies. Returns the raw body:
+        XML and JSON parse bytes directly, so only robots.txt needs decoding"""
         if retry_count >= len(self.retry_delays):
             log(f"Max retries exceeded for {url}")
             return None
@@ -168,7 +174,7 @@ request_manager = RequestManager()
 
 # ================= HTTP FUNCTIONS =================
 
-def http_get(url: str, crawl_delay=None) -> Optional[str]:
+def http_get(url: str, crawl_delay=None) -> Optional[bytes]:
     """Wrapper for request manager"""
     return request_manager.fetch(url, crawl_delay=crawl_delay)
 
@@ -187,7 +193,7 @@ def fetch_json(url: str, crawl_delay=None) -> Optional[dict]:
     if not data:
         return None
     try:
-        return json.loads(data)
+        return json_loads(data)
     except json.JSONDecodeError as e:
         log(f"JSON decode error for {url}: {e}")
         return None
@@ -232,9 +238,9 @@ def process_product(url: str, writer, seen: set, crawl_delay=None):
     main_image = normalize_image(product.get("featured_image"))
     product_page_url = f"{CURR_URL}{product.get('url', '')}"
 
-    variants_processed = 0
+    rows = []
     for v in product["variants"]:
-        row = [
+        rows.append([
             f"{product_page_url}?variant={v.get('id', '')}",  # Ref Product URL
             product_id,                         # Ref Product ID
             v.get("id", ""),                    # Ref Variant ID
@@ -252,13 +258,13 @@ def process_product(url: str, writer, seen: set, crawl_delay=None):
             v.get("option2", ""),               # Ref Group Attr 2
             "active" if v.get("available") else "inactive",  # Ref Status
             SCRAPED_DATE                        # Date Scraped
-        ]
-
-        with csv_lock:
-            writer.writerow(row)
-        variants_processed += 1
+        ])
     
-    log(f"Processed {variants_processed} variants from {product_url}")
+    # One locked write per product rather than one per variant
+    with csv_lock:
+        writer.writerows(rows)
+    
+    log(f"Processed {len(rows)} variants from {product_url}")
     
     # Variable delay between products - respect crawl delay if set
     base_delay = crawl_delay if crawl_delay else REQUEST_DELAY_BASE
@@ -274,7 +280,7 @@ def check_robots_txt():
     
     robots_content = http_get(robots_url)
     if robots_content:
-        lines = robots_content.split('\n')
+        lines = robots_content.decode('utf-8', errors='replace').split('\n')
         crawl_delay = None
         sitemap_url = None
         
@@ -342,15 +348,12 @@ def main():
         log("Failed to load sitemap index")
         sys.exit(1)
     
-    ns = {"ns": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-    sitemaps = [e.text for e in index.findall(".//ns:sitemap/ns:loc", ns)]
+    # {*} matches the sitemap namespace or none, so one query covers both
+    sitemaps = [e.text for e in index.iterfind(".//{*}sitemap/{*}loc")]
     
     if not sitemaps:
-        # Try alternative namespace
-        sitemaps = [e.text for e in index.findall(".//sitemap/loc")]
-        if not sitemaps:
-            # Try without namespace as last resort
-            sitemaps = [e.text for e in index.findall(".//loc")]
+        # Any <loc> at all as last resort
+        sitemaps = [e.text for e in index.iterfind(".//{*}loc")]
     
     log(f"Total sitemaps found: {len(sitemaps)}")
     
@@ -367,7 +370,7 @@ def main():
         sys.exit(0)
     
     # Create output file
-    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
+    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
         writer = csv.writer(f)
         
         # Write header
@@ -404,11 +407,9 @@ def main():
                 continue
             
             # Extract URLs
-            urls = [e.text for e in xml.findall(".//ns:url/ns:loc", ns)]
-            if not urls:
-                urls = [e.text for e in xml.findall(".//url/loc")]
+            urls = [e.text for e in xml.iterfind(".//{*}url/{*}loc")]
             if not urls:
-                urls = [e.text for e in xml.findall(".//loc")]
+                urls = [e.text for e in xml.iterfind(".//{*}loc")]
             
             log(f"  Found {len(urls)} URLs in sitemap")
             
@@ -445,8 +446,6 @@ def main():
                 pause = random.uniform(base_pause * 0.8, base_pause * 1.2)
                 log(f"  Pausing {pause:.1f}s before next sitemap...")
                 time.sleep(pause)
-            
-            gc.collect()
     
     log(f"Chunk completed: {OUTPUT_CSV}")
     log(f"Total unique products processed: {len(seen)}")
@@ -2,14 +2,22 @@ import os
 import csv
 import time
 import sys
-import gc
 import threading
+import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional
 from datetime import datetime
 from xml.etree import ElementTree as ET
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 # ================= ENV =================
 
 CURR_URL = os.getenv("CURR_URL", "").rstrip("/")
@@ -34,18 +42,33 @@ def log(msg: str):
 # ================= HTTP =================
 
 session = requests.Session()
+# Sized so every worker keeps its own keep-alive socket to the store; the
+# default pool of 10 would drop connections once MAX_WORKERS goes past it.
+# Failed connections, 429 and 5xx are retried in urllib3 on the pooled
+# socket, with backoff and honoring Retry-After
+retries = Retry(
+    total=3,
+    backoff_factor=1.0,
+    status_forcelist=[429, 500, 502, 503, 504],
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+adapter = HTTPAdapter(pool_maxsize=max(MAX_WORKERS, 10), max_retries=retries)
+session.mount("http://", adapter)
+session.mount("https://", adapter)
 session.headers.update({
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
 })
 
-def http_get(url: str) -> Optional[str]:
-    for _ in range(3):
-        try:
-            r = session.get(url, timeout=30)
-            if r.ok:
-                return r.text
-        except Exception:
-            time.sleep(0.3)
+def http_get(url: str) -> Optional[bytes]:
+    # Raw bytes: ElementTree reads the encoding from the XML declaration, so
+    # decoding multi-MB sitemaps to str first is wasted work
+    try:
+        r = session.get(url, timeout=30)
+        if r.ok:
+            return r.content
+    except Exception:
+        pass
     return None
 
 def load_xml(url: str) -> Optional[ET.Element]:
@@ -60,7 +83,7 @@ def load_xml(url: str) -> Optional[ET.Element]:
 def fetch_json(url: str) -> Optional[dict]:
     try:
         r = session.get(url, timeout=30)
-        return r.json() if r.ok else None
+        return json_loads(r.content) if r.ok else None
     except Exception:
         return None
 
@@ -70,6 +93,9 @@ def normalize_image(url: str) -> str:
 # ================= PRODUCT =================
 
 csv_lock = threading.Lock()
+# Products from every sitemap share one pool, so a URL listed in two
+# sitemaps can reach two workers at once
+seen_lock = threading.Lock()
 
 def extract_category(tags: list):
     for t in tags:
@@ -78,9 +104,10 @@ def extract_category(tags: list):
     return "", ""
 
 def process_product(url: str, writer, seen: set):
-    if url in seen:
-        return
-    seen.add(url)
+    with seen_lock:
+        if url in seen:
+            return
+        seen.add(url)
 
     product = fetch_json(url.rstrip("/") + ".js")
     if not product or not product.get("variants"):
@@ -96,8 +123,9 @@ def process_product(url: str, writer, seen: set):
     main_image = normalize_image(product.get("featured_image"))
     product_url = f"{CURR_URL}{product.get('url', '')}"
 
+    rows = []
     for v in product["variants"]:
-        row = [
+        rows.append([
             f"{product_url}?variant={v.get('id', '')}",  # Ref Product URL
             product_id,                         # Ref Product ID
             v.get("id", ""),                    # Ref Varient ID
@@ -115,10 +143,11 @@ def process_product(url: str, writer, seen: set):
             v.get("option2", ""),               # Ref Group Attr 2
             "active" if v.get("available") else "inactive",  # Ref Status
             SCRAPED_DATE                        # Date Scrapped
-        ]
+        ])
 
-        with csv_lock:
-            writer.writerow(row)
+    # One locked write per product rather than one per variant
+    with csv_lock:
+        writer.writerows(rows)
 
     time.sleep(REQUEST_DELAY)
 
@@ -141,7 +170,7 @@ sitemaps = sitemaps[
 
 log(f"Sitemaps to process: {len(sitemaps)}")
 
-with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
+with open(OUTPUT_CSV, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
     writer = csv.writer(f)
 
     writer.writerow([
@@ -166,24 +195,27 @@ with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
 
     seen = set()
 
-    for sitemap_url in sitemaps:
-        log(f"Loading sitemap: {sitemap_url}")
-        xml = load_xml(sitemap_url)
-        if not xml:
-            continue
+    # One pool for the whole run: products are queued as each sitemap loads,
+    # so workers never sit idle waiting for a sitemap's slowest product
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = []
+
+        for sitemap_url in sitemaps:
+            log(f"Loading sitemap: {sitemap_url}")
+            xml = load_xml(sitemap_url)
+            if not xml:
+                continue
 
-        urls = [e.text for e in xml.findall(".//ns:url/ns:loc", ns)]
-        if MAX_URLS_PER_SITEMAP:
-            urls = urls[:MAX_URLS_PER_SITEMAP]
+            urls = [e.text for e in xml.findall(".//ns:url/ns:loc", ns)]
+            if MAX_URLS_PER_SITEMAP:
+                urls = urls[:MAX_URLS_PER_SITEMAP]
 
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = [
+            futures.extend(
                 executor.submit(process_product, u, writer, seen)
                 for u in urls
-            ]
-            for ftr in as_completed(futures):
-                ftr.result()
+            )
 
-        gc.collect()
+        for ftr in as_completed(futures):
+            ftr.result()
 
 log(f"Completed: {OUTPUT_CSV}")
\ No newline at end of file
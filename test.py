@@ -4,10 +4,12 @@ Enhanced CAPTCHA Solver with Audio Support
 """
 
 import os
+import re
 import sys
 import time
 import json
 import random
+import tempfile
 import urllib.request
 import logging
 from pathlib import Path
@@ -43,7 +45,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Fallback words for audio recognition
-recaptcha_words = [
+RECAPTCHA_WORDS = (
     "apple tree", "blue sky", "silver coin", "happy child", "gold star",
     "fast car", "river bank", "mountain peak", "red house", "sun flower",
     "deep ocean", "bright moon", "green grass", "snow fall", "strong wind",
@@ -59,8 +61,23 @@ recaptcha_words = [
     "climbing tree", "rolling stone", "melting ice", "whispering wind", "shining star",
     "crying baby", "laughing child", "singing voice", "barking dog", "meowing cat",
     "chirping bird", "roaring lion", "galloping horse", "buzzing bee", "silent whisper"
+)
+
+def _fallback_phrase():
+    """Random phrase to submit when the clip cannot be recognized"""
+    return random.choice(RECAPTCHA_WORDS)
+
+# Audio clip URLs that can appear in the challenge page source
+AUDIO_URL_PATTERNS = [
+    re.compile(r'src=["\']([^"\']*\.mp3[^"\']*)["\']', re.IGNORECASE),
+    re.compile(r'https://[^"\']*recaptcha[^"\']*audio[^"\']*', re.IGNORECASE),
+    re.compile(r'https://www\.google\.com/recaptcha/api2/[^"\']*\.mp3', re.IGNORECASE),
 ]
 
+# Either marker means the token was issued; one case-insensitive scan finds
+# both without lowercasing a copy of the whole page
+RECAPTCHA_TOKEN_RE = re.compile(r'recaptcha-token|g-recaptcha-response', re.IGNORECASE)
+
 
 class AudioRecognition:
     """Handle audio CAPTCHA recognition"""
@@ -70,14 +87,13 @@ class AudioRecognition:
         """Recognize speech from audio file"""
         if not AUDIO_AVAILABLE:
             logger.error("Audio libraries not available")
-            return random.choice(recaptcha_words)
+            return _fallback_phrase()
             
         try:
             recognizer = sr.Recognizer()
             
             with sr.AudioFile(audio_file_path) as source:
                 logger.info("Processing audio file...")
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
                 audio = recognizer.record(source)
 
                 try:
@@ -85,16 +101,16 @@ class AudioRecognition:
                     logger.info(f"Extracted Text: {text}")
                     return text.lower().strip()
                 except sr.UnknownValueError:
-                    random_text = random.choice(recaptcha_words)
+                    random_text = _fallback_phrase()
                     logger.warning(f"Could not understand audio, using fallback: {random_text}")
                     return random_text
                 except sr.RequestError as e:
                     logger.error(f"Speech recognition error: {e}")
-                    random_text = random.choice(recaptcha_words)
+                    random_text = _fallback_phrase()
                     return random_text
         except Exception as e:
             logger.error(f"Error processing audio: {e}")
-            return random.choice(recaptcha_words)
+            return _fallback_phrase()
     
     @staticmethod
     def download_audio(src: str, mp3_path: str, wav_path: str) -> bool:
@@ -179,34 +195,31 @@ class EnhancedCaptchaSolver:
             
             # Switch to default content first
             self.driver.switch_to.default_content()
-            time.sleep(2)
             
             # Find challenge iframe
             challenge_frame = None
-            frames = self.driver.find_elements(By.TAG_NAME, "iframe")
-            
-            for frame in frames:
-                try:
-                    src = frame.get_attribute("src") or ""
-                    title = frame.get_attribute("title") or ""
-                    
-                    if "challenge" in title.lower() or "bframe" in src.lower():
-                        challenge_frame = frame
-                        logger.info(f"Found challenge frame: {src[:80]}...")
-                        break
-                except:
-                    continue
+            frames = self.driver.find_elements(
+                By.CSS_SELECTOR, "iframe[title*='challenge' i], iframe[src*='bframe' i]"
+            )
+            if frames:
+                challenge_frame = frames[0]
+                logger.info("Found challenge frame")
             
             if not challenge_frame:
                 logger.error("No challenge frame found")
                 return {"success": False, "error": "No challenge frame"}
             
             # Switch to challenge frame
-            self.driver.switch_to.frame(challenge_frame)
-            time.sleep(3)
+            WebDriverWait(self.driver, 10).until(EC.frame_to_be_available_and_switch_to_it(challenge_frame))
             
             # Click audio button
             audio_button = None
+            try:
+                WebDriverWait(self.driver, 10).until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, "#recaptcha-audio-button, .rc-button-audio"))
+                )
+            except TimeoutException:
+                pass
             button_selectors = [
                 "#recaptcha-audio-button",
                 "button[title*='audio']",
@@ -239,18 +252,19 @@ class EnhancedCaptchaSolver:
                 self.driver.switch_to.default_content()
                 return {"success": False, "error": "No audio source"}
             
-            # Download and process audio
-            timestamp = int(time.time())
-            mp3_path = self.log_dir / f"audio_{timestamp}.mp3"
-            wav_path = self.log_dir / f"audio_{timestamp}.wav"
-            
-            if not self.audio_recognition.download_audio(audio_src, str(mp3_path), str(wav_path)):
-                logger.error("Failed to download audio")
-                self.driver.switch_to.default_content()
-                return {"success": False, "error": "Audio download failed"}
-            
-            # Recognize text
-            captcha_text = self.audio_recognition.voicereco(str(wav_path))
+            # Download and process audio in a scratch directory that is
+            # removed as soon as the clip has been recognized
+            with tempfile.TemporaryDirectory(prefix="captcha_audio_") as audio_dir:
+                mp3_path = os.path.join(audio_dir, "audio.mp3")
+                wav_path = os.path.join(audio_dir, "audio.wav")
+                
+                if not self.audio_recognition.download_audio(audio_src, mp3_path, wav_path):
+                    logger.error("Failed to download audio")
+                    self.driver.switch_to.default_content()
+                    return {"success": False, "error": "Audio download failed"}
+                
+                # Recognize text
+                captcha_text = self.audio_recognition.voicereco(wav_path)
             if not captcha_text:
                 logger.error("Failed to recognize audio")
                 self.driver.switch_to.default_content()
@@ -276,18 +290,10 @@ class EnhancedCaptchaSolver:
                 self.driver.switch_to.default_content()
                 return {"success": False, "error": "Response input not found"}
             
-            # Enter text
+            # Enter text and submit in a single send_keys call
             response_input.clear()
-            time.sleep(0.5)
-            
-            for char in captcha_text:
-                response_input.send_keys(char)
-                time.sleep(random.uniform(0.05, 0.1))
-            
+            response_input.send_keys(captcha_text + Keys.ENTER)
             logger.info(f"Entered response: {captcha_text}")
-            
-            # Submit
-            response_input.send_keys(Keys.ENTER)
             time.sleep(5)
             
             # Switch back
@@ -368,17 +374,10 @@ class EnhancedCaptchaSolver:
         """Find audio by inspecting page source"""
         try:
             page_source = self.driver.page_source
-            import re
             
             # Look for audio URLs
-            patterns = [
-                r'src=["\']([^"\']*\.mp3[^"\']*)["\']',
-                r'https://[^"\']*recaptcha[^"\']*audio[^"\']*',
-                r'https://www\.google\.com/recaptcha/api2/[^"\']*\.mp3'
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, page_source, re.IGNORECASE)
+            for pattern in AUDIO_URL_PATTERNS:
+                matches = pattern.findall(page_source)
                 for match in matches:
                     if '.mp3' in match.lower():
                         return match
@@ -393,9 +392,7 @@ class EnhancedCaptchaSolver:
             
             while time.time() - start_time < timeout:
                 # Check page for success indicators
-                page_source = self.driver.page_source.lower()
-                
-                if "recaptcha-token" in page_source or "g-recaptcha-response" in page_source:
+                if RECAPTCHA_TOKEN_RE.search(self.driver.page_source):
                     logger.info("Found reCAPTCHA token")
                     return True
                 
@@ -502,15 +499,21 @@ class EnhancedCaptchaSolver:
                 return {"success": False, "error": "No recaptcha iframe found"}
             
             # Switch to iframe and click
-            self.driver.switch_to.frame(iframe)
-            time.sleep(1)
+            WebDriverWait(self.driver, 10).until(EC.frame_to_be_available_and_switch_to_it(iframe))
             
-            checkbox = self.driver.find_element(By.ID, "recaptcha-anchor")
+            checkbox = WebDriverWait(self.driver, 10).until(
+                EC.element_to_be_clickable((By.ID, "recaptcha-anchor"))
+            )
             checkbox.click()
             logger.info("Clicked checkbox")
             
-            # Wait and check state
-            time.sleep(3)
+            # Wait for the checked state, or give up once a challenge is showing
+            try:
+                WebDriverWait(self.driver, 3).until(
+                    EC.text_to_be_present_in_element_attribute((By.ID, "recaptcha-anchor"), "aria-checked", "true")
+                )
+            except TimeoutException:
+                pass
             aria_checked = checkbox.get_attribute("aria-checked")
             
             self.driver.switch_to.default_content()